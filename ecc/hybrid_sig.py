@@ -0,0 +1,314 @@
+"""
+Signatura híbrida ECDSA + HBS en un paquet binari compacte.
+
+El paquet conté la signatura ECDSA de la transacció, la signatura HBS del mateix
+missatge, la clau pública HBS, l'índex de l'esquema com a fulla de l'arbre de
+merkle_ecc i els seus complementaris (auth path). Així es comprova tant la part
+clàssica com la post-quàntica i que la clau HBS pertany a l'arrel de Merkle de
+la qual es deriva la clau ECC.
+
+Format (big-endian):
+    versió (1) | índex fulla (1) | signatura ECDSA r||s (64) | nombre de complementaris (1)
+    | complementaris (32 cadascun) | mida pk HBS (4) | pk HBS | mida signatura HBS (4) | signatura HBS
+
+El verificador comprova primer el component més barat i s'atura a la primera
+fallada: per defecte l'auth path (uns pocs hashes), després la signatura HBS i
+finalment la ECDSA. La clau pública ECDSA no és una entrada: es deriva de
+l'arrel de Merkle igual que a ecc/ecc_keys.py, de manera que les dues meitats
+queden lligades a la mateixa arrel.
+
+Ús (des de l'arrel del projecte):
+    python -m ecc.hybrid_sig
+"""
+
+import functools
+import hashlib
+import os
+import struct
+import time
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pyspx.sha2_128s as sphincs  # SPHINCS+ variant: 128-bit security with SHA-2
+
+from ecc.ecc_keys import generate_private_key_from_merkle_root
+from ecc.sign_tx import load_private_key, load_tx_id, sign_tx_id
+from ecc.verify_tx import verify_signature
+from lamport.keygen_lamport import load_lamport_key, lamport_sign, lamport_verify
+from mss_lots.keygen_mss import mss_verify
+from sphincs.sign_sphincs import sphincs_verify
+from merkle_ecc.build_merkle_tree import root_from_auth_path
+
+VERSION = 1
+NODE_SIZE = 32
+HEADER = struct.Struct(">BB64sB")
+LENGTH = struct.Struct(">I")
+
+# Ordre de les fulles a merkle_ecc/build_merkle_tree.py
+SCHEME_NAMES = ["lamport", "wots_plus", "mss_lots", "sphincs"]
+# Alçada de l'arbre de merkle_ecc: tots els auth paths tenen exactament aquests nodes
+MERKLE_DEPTH = (len(SCHEME_NAMES) - 1).bit_length()
+
+# Ordre de verificació per defecte: del component més barat al més car
+DEFAULT_ORDER = ("merkle", "hbs", "ecdsa")
+
+
+# Funció hash
+def H(data):
+    return hashlib.sha256(data).digest()
+
+
+@functools.lru_cache(maxsize=16)
+def ecc_pubkey_from_root(merkle_root):
+    """
+    Deriva la clau pública ECC (hex no comprimit) que correspon a una arrel de merkle_ecc.
+    Args:
+        merkle_root (bytes): Arrel de merkle_ecc.
+    Return:
+        str: Clau pública ECC en hex.
+    """
+    return generate_private_key_from_merkle_root(merkle_root).get_public_key().to_hex(compressed=False)
+
+
+def encode_mss_signature(signature):
+    """
+    Serialitza una signatura de mss_sign(): índex (4) | signatura Lamport | pk0 | pk1 | auth path.
+    """
+    return (LENGTH.pack(signature["index"])
+            + b''.join(signature["lamport_sig"])
+            + b''.join(signature["pk0"])
+            + b''.join(signature["pk1"])
+            + b''.join(signature["auth_path"]))
+
+def decode_mss_signature(data):
+    """
+    Operació inversa d'encode_mss_signature().
+    """
+    nodes = [data[i:i + NODE_SIZE] for i in range(LENGTH.size, len(data), NODE_SIZE)]
+    return {
+        "index": LENGTH.unpack_from(data, 0)[0],
+        "lamport_sig": nodes[0:256],
+        "pk0": nodes[256:512],
+        "pk1": nodes[512:768],
+        "auth_path": nodes[768:],
+    }
+
+def split_nodes(data):
+    """
+    Divideix unes dades en blocs de 32 bytes.
+    """
+    return [data[i:i + NODE_SIZE] for i in range(0, len(data), NODE_SIZE)]
+
+
+def verify_hbs(scheme, message, hbs_pk, hbs_sig):
+    """
+    Verifica la signatura HBS segons l'esquema.
+    Args:
+        scheme (str): Nom de l'esquema.
+        message (bytes): Missatge signat.
+        hbs_pk (bytes): Clau pública HBS (la fulla de Merkle és H(hbs_pk)).
+            lamport: pk0 || pk1; mss_lots: arrel MSS; sphincs: clau pública.
+        hbs_sig (bytes): Signatura HBS serialitzada.
+    Return:
+        bool: True si la signatura és vàlida (False per esquemes no suportats).
+    """
+    if scheme == "lamport":
+        if len(hbs_pk) != 512 * NODE_SIZE or len(hbs_sig) != 256 * NODE_SIZE:
+            return False
+        pk = split_nodes(hbs_pk)
+        return lamport_verify(message, split_nodes(hbs_sig), pk[:256], pk[256:])
+    if scheme == "mss_lots":
+        if len(hbs_pk) != NODE_SIZE or (len(hbs_sig) - LENGTH.size) % NODE_SIZE != 0:
+            return False
+        signature = decode_mss_signature(hbs_sig)
+        if len(signature["pk1"]) != 256:
+            return False
+        return mss_verify(message, signature, hbs_pk)
+    if scheme == "sphincs":
+        if len(hbs_pk) != sphincs.crypto_sign_PUBLICKEYBYTES:
+            return False
+        return sphincs_verify(message, hbs_sig, hbs_pk)
+
+    # WOTS+ necessita també les màscares, que no formen part del pk_hash: no es pot verificar aquí
+    return False
+
+
+def create_hybrid_bundle(ecdsa_sig, leaf_index, auth_path, hbs_pk, hbs_sig):
+    """
+    Construeix el paquet binari de la signatura híbrida.
+    Args:
+        ecdsa_sig (bytes): Signatura ECDSA r||s (64 bytes).
+        leaf_index (int): Índex de l'esquema HBS com a fulla de merkle_ecc.
+        auth_path (list[bytes]): Complementaris de la fulla.
+        hbs_pk (bytes): Clau pública HBS.
+        hbs_sig (bytes): Signatura HBS serialitzada.
+    Return:
+        bytes: Paquet.
+    """
+    return (HEADER.pack(VERSION, leaf_index, ecdsa_sig, len(auth_path))
+            + b''.join(auth_path)
+            + LENGTH.pack(len(hbs_pk)) + hbs_pk
+            + LENGTH.pack(len(hbs_sig)) + hbs_sig)
+
+def parse_hybrid_bundle(bundle):
+    """
+    Llegeix un paquet binari.
+    Args:
+        bundle (bytes): Paquet.
+    Return:
+        dict: Camps del paquet, o None si el format no és vàlid.
+    """
+    try:
+        version, leaf_index, ecdsa_sig, path_len = HEADER.unpack_from(bundle, 0)
+        offset = HEADER.size
+        auth_path = split_nodes(bundle[offset:offset + path_len * NODE_SIZE])
+        offset += path_len * NODE_SIZE
+        (pk_len,) = LENGTH.unpack_from(bundle, offset)
+        offset += LENGTH.size
+        hbs_pk = bundle[offset:offset + pk_len]
+        offset += pk_len
+        (sig_len,) = LENGTH.unpack_from(bundle, offset)
+        offset += LENGTH.size
+        hbs_sig = bundle[offset:offset + sig_len]
+        offset += sig_len
+    except struct.error:
+        return None
+
+    if (version != VERSION or leaf_index >= len(SCHEME_NAMES) or path_len != MERKLE_DEPTH
+            or offset != len(bundle)
+            or len(auth_path) != path_len or len(hbs_pk) != pk_len or len(hbs_sig) != sig_len):
+        return None
+
+    return {
+        "leaf_index": leaf_index,
+        "scheme": SCHEME_NAMES[leaf_index],
+        "ecdsa_sig": ecdsa_sig,
+        "auth_path": auth_path,
+        "hbs_pk": hbs_pk,
+        "hbs_sig": hbs_sig,
+    }
+
+
+def verify_hybrid_bundle(bundle, tx_id_hex, merkle_root, order=DEFAULT_ORDER):
+    """
+    Verifica un paquet híbrid component a component i s'atura a la primera fallada.
+    Una excepció durant un component compta com a fallada d'aquest component.
+    Args:
+        bundle (bytes): Paquet.
+        tx_id_hex (str): Missatge signat (ID de la transacció en hex).
+        merkle_root (bytes): Arrel de merkle_ecc de confiança (també determina la clau ECC).
+        order (tuple[str]): Ordre dels components ('merkle', 'hbs', 'ecdsa').
+    Return:
+        tuple: (valid, failed, timings)
+            valid (bool): True si tots els components són vàlids.
+            failed (str): Component que ha fallat, o None.
+            timings (dict): Segons dedicats a cada component executat.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    fields = parse_hybrid_bundle(bundle)
+    timings["parse"] = time.perf_counter() - start
+    if fields is None:
+        return False, "parse", timings
+
+    message = bytes.fromhex(tx_id_hex)
+    pubkey_hex = ecc_pubkey_from_root(merkle_root)
+    checks = {
+        "merkle": lambda: root_from_auth_path(
+            H(fields["hbs_pk"]), fields["leaf_index"], fields["auth_path"]) == merkle_root,
+        "hbs": lambda: verify_hbs(fields["scheme"], message, fields["hbs_pk"], fields["hbs_sig"]),
+        "ecdsa": lambda: verify_signature(tx_id_hex, fields["ecdsa_sig"].hex(), pubkey_hex, verbose=False),
+    }
+
+    for component in order:
+        start = time.perf_counter()
+        try:
+            valid = checks[component]()
+        except Exception:
+            valid = False
+        timings[component] = time.perf_counter() - start
+        if not valid:
+            return False, component, timings
+
+    return True, None, timings
+
+def _verify_job(args):
+    """
+    Tasca d'un procés treballador per verify_hybrid_batch().
+    """
+    return verify_hybrid_bundle(*args)
+
+def verify_hybrid_batch(bundles, tx_ids, merkle_root, workers=None, chunksize=16,
+                        order=DEFAULT_ORDER):
+    """
+    Verifica molts paquets en paral·lel i agrega el temps per component.
+    Args:
+        bundles (list[bytes]): Paquets.
+        tx_ids (list[str]): ID de la transacció de cada paquet (hex).
+        merkle_root (bytes): Arrel de merkle_ecc de confiança.
+        workers (int, optional): Nombre de processos.
+        chunksize (int): Paquets per tasca.
+        order (tuple[str]): Ordre dels components.
+    Return:
+        tuple: (results, report)
+            results (list[bool]): Resultat de cada paquet, en ordre.
+            report (dict): Temps total i nombre de fallades per component, i temps de paret.
+    """
+    jobs = [(bundle, tx_id, merkle_root, order) for bundle, tx_id in zip(bundles, tx_ids)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(_verify_job, jobs, chunksize=chunksize))
+    wall = time.perf_counter() - start
+
+    report = {"bundles": len(outcomes), "wall_seconds": wall, "component_seconds": {}, "failures": {}}
+    for _, failed, timings in outcomes:
+        for component, seconds in timings.items():
+            report["component_seconds"][component] = report["component_seconds"].get(component, 0.0) + seconds
+        if failed is not None:
+            report["failures"][failed] = report["failures"].get(failed, 0) + 1
+
+    return [valid for valid, _, _ in outcomes], report
+
+
+def main():
+    """
+    Signa l'ID de la transacció amb ECDSA i amb la clau Lamport, construeix el paquet
+    híbrid amb els complementaris de merkle_ecc, el desa i el verifica.
+    La clau Lamport és d'un sol ús: no s'ha de tornar a signar amb la mateixa clau.
+    """
+
+    root_file = "merkle_ecc/root_merkle.json"
+    bundle_file = "signatures/tx_hybrid.bin"
+    scheme = "lamport"
+
+    tx_id = load_tx_id("ecc/btc_address.txt").encode().hex()
+    priv = load_private_key("ecc/ecc_private_key_wif.txt")
+    sk0, sk1, pk0, pk1 = load_lamport_key("lamport/sk_Lamport.json", "lamport/pk_Lamport.json")
+
+    with open(root_file, "r") as f:
+        merkle_data = json.load(f)
+    merkle_root = bytes.fromhex(merkle_data["merkle_root"])
+    auth_path = [bytes.fromhex(x) for x in merkle_data["complementaris"][scheme]]
+
+    ecdsa_sig = bytes.fromhex(sign_tx_id(tx_id, priv))
+    hbs_sig = b''.join(lamport_sign(bytes.fromhex(tx_id), sk0, sk1))
+    bundle = create_hybrid_bundle(ecdsa_sig, SCHEME_NAMES.index(scheme), auth_path,
+                                  b''.join(pk0 + pk1), hbs_sig)
+
+    os.makedirs(os.path.dirname(bundle_file), exist_ok=True)
+    with open(bundle_file, "wb") as f:
+        f.write(bundle)
+    print(f"Signatura híbrida ({len(bundle)} bytes) guardada a: {bundle_file}")
+
+    valid, failed, timings = verify_hybrid_bundle(bundle, tx_id, merkle_root)
+    for component, seconds in timings.items():
+        print(f"  {component}: {seconds * 1000:.3f} ms")
+    if valid:
+        print(f"La signatura híbrida per la transaccio {tx_id} es valida.")
+    else:
+        print(f"La signatura híbrida per la transaccio {tx_id} NO es valida (falla: {failed}).")
+
+if __name__ == "__main__":
+    main()
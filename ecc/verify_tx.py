@@ -3,13 +3,14 @@ from ecdsa import VerifyingKey, SECP256k1, BadSignatureError
 import hashlib
 
 
-def verify_signature(tx_id, signature_hex, pubkey_hex):
+def verify_signature(tx_id, signature_hex, pubkey_hex, verbose=True):
     """
     Verifica la signatura d'una transacció utilitzant la clau pública corresponent.
     Args:
         tx_id (str): L'ID de la transacció en format hexadecimal.
         signature_hex (str): La signatura de la transacció en format hexadecimal.
         pubkey_hex (str): La clau pública en format hexadecimal.
+        verbose (bool): Si és False, no s'escriu el motiu de la fallada (per verificacions en lot).
     Return:
         bool: Retorna True si la signatura és vàlida, False si no ho és.
     """
@@ -25,10 +26,12 @@ def verify_signature(tx_id, signature_hex, pubkey_hex):
         return vk.verify(signature_bytes, tx_bytes, hashfunc=hashlib.sha256)
 
     except BadSignatureError:
-        print("Signatura incorrecta: no coincideix amb el missatge i la clau publica.")
+        if verbose:
+            print("Signatura incorrecta: no coincideix amb el missatge i la clau publica.")
         return False
     except Exception as e:
-        print(f"Error: {str(e)}")
+        if verbose:
+            print(f"Error: {str(e)}")
         return False
 
 def main():
@@ -0,0 +1,254 @@
+"""
+Pool de pregeneració de claus d'un sol ús (Lamport i WOTS+).
+
+Uns processos treballadors generen claus en segon pla dins un buffer acotat.
+Quan el buffer baixa fins a la marca inferior ('low') es torna a omplir fins a
+la marca superior ('high'). get_key() retorna una clau ja generada a l'instant;
+si el buffer és buit, la clau es genera en el moment i es compta com a espera.
+
+Les claus no utilitzades es desen a disc en tancar el pool i es recuperen en
+tornar-lo a obrir. El fitxer s'esborra just després de carregar-lo, de manera
+que una clau lliurada mai no es pot tornar a lliurar després d'una caiguda.
+
+Ús (des de l'arrel del projecte):
+    python -m key_pool.ots_key_pool --scheme lamport --requests 50
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from lamport.keygen_lamport import lamport_keygen
+from wots_plus.keygen_wots_plus import wots_plus_keygen
+
+KEYGENS = {
+    "lamport": lamport_keygen,
+    "wots_plus": wots_plus_keygen,
+}
+
+
+def generate_key(scheme):
+    """
+    Genera una clau d'un sol ús. Ha de ser una funció de mòdul perquè s'executa en un altre procés.
+    Args:
+        scheme (str): 'lamport' o 'wots_plus'.
+    Return:
+        tuple: La clau tal com la retorna la funció keygen de l'esquema.
+    """
+    return KEYGENS[scheme]()
+
+
+def encode_key(value):
+    """
+    Converteix una clau (tuples i llistes de bytes) a una estructura serialitzable en JSON.
+    """
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, (list, tuple)):
+        return [encode_key(v) for v in value]
+    return value
+
+
+def decode_key(data):
+    """
+    Operació inversa d'encode_key(). El nivell superior es torna a convertir en tupla.
+    """
+    def decode(value):
+        if isinstance(value, str):
+            return bytes.fromhex(value)
+        if isinstance(value, list):
+            return [decode(v) for v in value]
+        return value
+    return tuple(decode(v) for v in data)
+
+
+def load_pool_file(path, scheme):
+    """
+    Carrega les claus desades i, un cop validades, esborra el fitxer per evitar reutilitzar-les.
+    Args:
+        path (str): Fitxer del pool.
+        scheme (str): Esquema esperat.
+    Return:
+        list[tuple]: Claus carregades.
+    """
+    if path is None or not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        data = json.load(f)
+    if data["scheme"] != scheme:
+        raise ValueError(f"El fitxer {path} conté claus '{data['scheme']}', no '{scheme}'")
+    keys = [decode_key(k) for k in data["keys"]]
+    # Només s'esborra un cop validat: un fitxer d'un altre esquema no es perd
+    os.remove(path)
+    return keys
+
+
+def save_pool_file(path, scheme, keys):
+    """
+    Desa les claus no utilitzades de forma atòmica.
+    Args:
+        path (str): Fitxer del pool.
+        scheme (str): Esquema de les claus.
+        keys (list[tuple]): Claus a desar.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"scheme": scheme, "keys": [encode_key(k) for k in keys]}, f)
+    os.replace(tmp_path, path)
+
+
+class OneTimeKeyPool:
+    """
+    Buffer de claus d'un sol ús omplert per processos en segon pla.
+    Args:
+        scheme (str): 'lamport' o 'wots_plus'.
+        low (int): Marca inferior; en arribar-hi es demana omplir el buffer.
+        high (int): Marca superior; mida màxima del buffer.
+        workers (int, optional): Nombre de processos generadors.
+        pool_file (str, optional): Fitxer on es desen les claus no utilitzades.
+    """
+
+    def __init__(self, scheme, low=8, high=32, workers=None, pool_file=None):
+        if scheme not in KEYGENS:
+            raise ValueError(f"Esquema no suportat: {scheme}")
+        if not 0 <= low < high:
+            raise ValueError("Cal que 0 <= low < high")
+
+        self.scheme = scheme
+        self.low = low
+        self.high = high
+        self.pool_file = pool_file
+
+        self._lock = threading.Lock()
+        self._buffer = deque(load_pool_file(pool_file, scheme))
+        self._inflight = 0
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+        self._requests = 0
+        self._hits = 0
+        self._stalls = 0
+        self._stall_time = 0.0
+        self._generated = 0
+
+        self._refill()
+
+    def _refill(self):
+        """
+        Si el buffer (comptant les claus en curs) és a la marca inferior, l'omple fins a la superior.
+        """
+        with self._lock:
+            available = len(self._buffer) + self._inflight
+            if available > self.low:
+                return
+            missing = self.high - available
+            self._inflight += missing
+
+        for _ in range(missing):
+            future = self._executor.submit(generate_key, self.scheme)
+            future.add_done_callback(self._on_key_ready)
+
+    def _on_key_ready(self, future):
+        """
+        Afegeix al buffer una clau generada en segon pla.
+        """
+        with self._lock:
+            self._inflight -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._buffer.append(future.result())
+            self._generated += 1
+
+    def get_key(self):
+        """
+        Retorna una clau d'un sol ús. Cada clau es lliura una sola vegada.
+        Return:
+            tuple: Clau tal com la retorna la funció keygen de l'esquema.
+        """
+        with self._lock:
+            self._requests += 1
+            key = self._buffer.popleft() if self._buffer else None
+            if key is not None:
+                self._hits += 1
+
+        if key is None:
+            # Buffer buit: la clau es genera en el camí crític
+            start = time.perf_counter()
+            key = generate_key(self.scheme)
+            with self._lock:
+                self._stalls += 1
+                self._stall_time += time.perf_counter() - start
+
+        self._refill()
+        return key
+
+    def metrics(self):
+        """
+        Mètriques del pool.
+        Return:
+            dict: Peticions, encerts, esperes, taxa d'encert i temps d'espera.
+        """
+        with self._lock:
+            return {
+                "scheme": self.scheme,
+                "requests": self._requests,
+                "hits": self._hits,
+                "stalls": self._stalls,
+                "hit_rate": self._hits / self._requests if self._requests else 0.0,
+                "stall_time_ms": self._stall_time * 1000,
+                "avg_stall_ms": self._stall_time * 1000 / self._stalls if self._stalls else 0.0,
+                "generated_in_background": self._generated,
+                "buffered": len(self._buffer),
+                "inflight": self._inflight,
+            }
+
+    def close(self):
+        """
+        Atura els processos (esperant les claus en curs) i desa les claus no utilitzades.
+        """
+        self._executor.shutdown(wait=True)
+        if self.pool_file is not None:
+            with self._lock:
+                keys = list(self._buffer)
+                self._buffer.clear()
+            save_pool_file(self.pool_file, self.scheme, keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    """
+    Demostració: demana claus a un ritme fix i mostra les mètriques del pool.
+    """
+
+    parser = argparse.ArgumentParser(description="Pool de claus d'un sol ús")
+    parser.add_argument("--scheme", choices=sorted(KEYGENS), default="lamport")
+    parser.add_argument("--low", type=int, default=8)
+    parser.add_argument("--high", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--requests", type=int, default=50, help="claus a demanar")
+    parser.add_argument("--interval", type=float, default=0.01, help="segons entre peticions")
+    parser.add_argument("--pool-file", default="key_pool/pool_keys.json")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.pool_file) or ".", exist_ok=True)
+
+    with OneTimeKeyPool(args.scheme, args.low, args.high, args.workers, args.pool_file) as pool:
+        for _ in range(args.requests):
+            pool.get_key()
+            time.sleep(args.interval)
+        metrics = pool.metrics()
+
+    print(json.dumps(metrics, indent=4))
+    print(f"Claus no utilitzades desades a {args.pool_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark de verificació Lamport: clau pública completa vs. mode comprimit.
+
+Mode complet: el verificador carrega pk0 i pk1 (512 hashes) i comprova cada preimatge.
+Mode comprimit: el verificador només carrega el pk_hash (32 bytes) i la signatura porta
+les meitats no revelades; es reconstrueix H(pk0 || pk1) en una sola passada.
+
+Ús (des de l'arrel del projecte):
+    python -m lamport.bench_lamport --reps 200
+"""
+
+import argparse
+import json
+import os
+import secrets
+import tempfile
+import time
+
+from lamport.keygen_lamport import (
+    lamport_keygen, save_lamport_key, load_lamport_pk_hash,
+    lamport_sign, lamport_verify, lamport_sign_compressed, lamport_verify_compressed,
+)
+
+
+def time_per_call(fn, reps):
+    """
+    Temps mitjà (ms) d'una funció sense arguments.
+    """
+    start = time.perf_counter()
+    for _ in range(reps):
+        if not fn():
+            raise RuntimeError("La verificació ha fallat durant el benchmark")
+    return (time.perf_counter() - start) / reps * 1000
+
+
+def load_full_pk(path):
+    """
+    Carrega la clau pública completa (pk0, pk1) del fitxer JSON.
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    return [bytes.fromhex(p) for p in data["pk0"]], [bytes.fromhex(p) for p in data["pk1"]]
+
+
+def main():
+    """
+    Compara mida del fitxer públic, temps de càrrega i temps de verificació dels dos modes.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark Lamport: pk completa vs. comprimida")
+    parser.add_argument("--reps", type=int, default=100)
+    args = parser.parse_args()
+
+    message = secrets.token_bytes(32)
+    sk0, sk1, pk0, pk1 = lamport_keygen()
+    signature = lamport_sign(message, sk0, sk1)
+    revealed, unrevealed = lamport_sign_compressed(message, sk0, sk1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sk_file = os.path.join(tmp, "sk.json")
+        full_pk_file = os.path.join(tmp, "pk_full.json")
+        compressed_pk_file = os.path.join(tmp, "pk_compressed.json")
+        save_lamport_key(sk0, sk1, pk0, pk1, sk_file, full_pk_file)
+        save_lamport_key(sk0, sk1, pk0, pk1, sk_file, compressed_pk_file, compressed=True)
+
+        full_size = os.path.getsize(full_pk_file)
+        compressed_size = os.path.getsize(compressed_pk_file)
+
+        def full_load_verify():
+            p0, p1 = load_full_pk(full_pk_file)
+            return lamport_verify(message, signature, p0, p1)
+
+        def compressed_load_verify():
+            pk_hash = load_lamport_pk_hash(compressed_pk_file)
+            return lamport_verify_compressed(message, revealed, unrevealed, pk_hash)
+
+        pk_hash = load_lamport_pk_hash(compressed_pk_file)
+        full_verify_ms = time_per_call(lambda: lamport_verify(message, signature, pk0, pk1), args.reps)
+        compressed_verify_ms = time_per_call(
+            lambda: lamport_verify_compressed(message, revealed, unrevealed, pk_hash), args.reps)
+        full_total_ms = time_per_call(full_load_verify, args.reps)
+        compressed_total_ms = time_per_call(compressed_load_verify, args.reps)
+
+    print(f"{'':<24}{'complet':>12}{'comprimit':>12}")
+    print(f"{'fitxer pk (bytes)':<24}{full_size:>12}{compressed_size:>12}")
+    print(f"{'signatura (bytes)':<24}{len(signature) * 32:>12}{(len(revealed) + len(unrevealed)) * 32:>12}")
+    print(f"{'verificació (ms)':<24}{full_verify_ms:>12.3f}{compressed_verify_ms:>12.3f}")
+    print(f"{'càrrega + verif. (ms)':<24}{full_total_ms:>12.3f}{compressed_total_ms:>12.3f}")
+    print(f"Reducció del fitxer públic: {full_size / compressed_size:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -40,9 +40,93 @@ def lamport_keygen():
     return sk0, sk1, pk0, pk1
 
 
+def message_bits(message):
+    """
+    Descripció: Obté els N_BITS bits (del més significatiu al menys) del hash del missatge.
+    Args: message (bytes): Missatge.
+    Return: list[int]: Llista de bits.
+    """
+    value = int.from_bytes(H(message), 'big')
+    return [(value >> (N_BITS - 1 - i)) & 1 for i in range(N_BITS)]
+
+
+def lamport_sign(message, sk0, sk1):
+    """ Descripció: Signa un missatge revelant la preimatge corresponent a cada bit del seu hash.
+        Args:   message (bytes): Missatge a signar.
+                sk0 (list[bytes]): Claus secretes sk0.
+                sk1 (list[bytes]): Claus secretes sk1.
+        Return: list[bytes]: Signatura (256 preimatges).
+    """
+    return [sk1[i] if bit else sk0[i] for i, bit in enumerate(message_bits(message))]
+
+
+def lamport_verify(message, signature, pk0, pk1):
+    """ Descripció: Verifica una signatura Lamport amb la clau pública completa.
+        Args:   message (bytes): Missatge signat.
+                signature (list[bytes]): Preimatges revelades.
+                pk0 (list[bytes]): Claus públiques pk0.
+                pk1 (list[bytes]): Claus públiques pk1.
+        Return: bool: True si la signatura és vàlida.
+    """
+    if len(signature) != N_BITS:
+        return False
+    for i, bit in enumerate(message_bits(message)):
+        expected = pk1[i] if bit else pk0[i]
+        if H(signature[i]) != expected:
+            return False
+    return True
+
+def lamport_sign_compressed(message, sk0, sk1):
+    """ Descripció: Signa un missatge per al mode de clau pública comprimida. A més de les
+                   preimatges revelades, la signatura porta les 256 meitats de la clau pública
+                   que no es revelen, de manera que el verificador només necessita el pk_hash.
+        Args:   message (bytes): Missatge a signar.
+                sk0 (list[bytes]): Claus secretes sk0.
+                sk1 (list[bytes]): Claus secretes sk1.
+        Return: tuple: (revealed, unrevealed)
+                revealed (list[bytes]): Preimatges revelades (256).
+                unrevealed (list[bytes]): Meitats de la clau pública no revelades (256).
+    """
+    revealed, unrevealed = [], []
+    for i, bit in enumerate(message_bits(message)):
+        if bit:
+            revealed.append(sk1[i])
+            unrevealed.append(H(sk0[i]))
+        else:
+            revealed.append(sk0[i])
+            unrevealed.append(H(sk1[i]))
+    return revealed, unrevealed
+
+
+def lamport_verify_compressed(message, revealed, unrevealed, pk_hash):
+    """ Descripció: Verifica una signatura comprimida en una sola passada: fa hash de cada
+                   preimatge revelada, la combina amb la meitat no revelada i va alimentant
+                   el hash H(pk0 || pk1), que es compara amb el pk_hash de 32 bytes.
+        Args:   message (bytes): Missatge signat.
+                revealed (list[bytes]): Preimatges revelades.
+                unrevealed (list[bytes]): Meitats de la clau pública no revelades.
+                pk_hash (bytes): Hash de la clau pública (el de pk_Lamport.json).
+        Return: bool: True si la signatura és vàlida.
+    """
+    if len(revealed) != N_BITS or len(unrevealed) != N_BITS:
+        return False
+
+    pk_hasher = hashlib.sha256()  # rep pk0 directament
+    pk1_tail = bytearray()        # pk1 s'afegeix al final
+    for i, bit in enumerate(message_bits(message)):
+        if bit:
+            pk_hasher.update(unrevealed[i])
+            pk1_tail += H(revealed[i])
+        else:
+            pk_hasher.update(H(revealed[i]))
+            pk1_tail += unrevealed[i]
+    pk_hasher.update(pk1_tail)
+    return pk_hasher.digest() == pk_hash
 
 
-def save_lamport_key(sk0, sk1, pk0, pk1, SK_filename, PK_filename):
+
+
+def save_lamport_key(sk0, sk1, pk0, pk1, SK_filename, PK_filename, compressed=False):
     """
         Guarda les claus Lamport en fitxers JSON.
         Args:   sk0 (list[bytes]): Claus secretes sk0.
@@ -51,6 +135,7 @@ def save_lamport_key(sk0, sk1, pk0, pk1, SK_filename, PK_filename):
                 pk1 (list[bytes]): Claus públiques pk1.
                 SK_filename (str): Ruta del fitxer on guardar les claus secretes.
                 PK_filename (str): Ruta del fitxer on guardar les claus públiques.
+                compressed (bool): Si és True, només es guarda el pk_hash (mode comprimit).
     """
 
     # S'ha de convertir a hex per guardar-la
@@ -62,11 +147,11 @@ def save_lamport_key(sk0, sk1, pk0, pk1, SK_filename, PK_filename):
     # Creació del hash per la posterior utilització en Merkle
     pk_hash = H(b''.join(pk0 + pk1))
 
-    pk_data = {
-        "pk_hash": pk_hash.hex(),
-        "pk0": [p.hex() for p in pk0],
-        "pk1": [p.hex() for p in pk1],
-    }
+    pk_data = {"pk_hash": pk_hash.hex()}
+    if not compressed:
+        pk_data["pk0"] = [p.hex() for p in pk0]
+        pk_data["pk1"] = [p.hex() for p in pk1]
+
     with open(SK_filename, "w") as f:
         json.dump(sk_data, f, indent=4)
 
@@ -74,10 +159,47 @@ def save_lamport_key(sk0, sk1, pk0, pk1, SK_filename, PK_filename):
         json.dump(pk_data, f, indent=4)
 
 
-def main():
+def load_lamport_key(SK_filename, PK_filename):
+    """
+        Carrega les claus Lamport des dels fitxers JSON. Si el fitxer públic és
+        comprimit, pk0 i pk1 es recalculen a partir de les claus secretes.
+        Args:   SK_filename (str): Ruta del fitxer de les claus secretes.
+                PK_filename (str): Ruta del fitxer de les claus públiques.
+        Return: tuple: (sk0, sk1, pk0, pk1)
+    """
+
+    with open(SK_filename, "r") as f:
+        sk_data = json.load(f)
+    with open(PK_filename, "r") as f:
+        pk_data = json.load(f)
+
+    sk0 = [bytes.fromhex(s) for s in sk_data["sk0"]]
+    sk1 = [bytes.fromhex(s) for s in sk_data["sk1"]]
+    if "pk0" in pk_data:
+        pk0 = [bytes.fromhex(p) for p in pk_data["pk0"]]
+        pk1 = [bytes.fromhex(p) for p in pk_data["pk1"]]
+    else:
+        pk0 = [H(s) for s in sk0]
+        pk1 = [H(s) for s in sk1]
+    return sk0, sk1, pk0, pk1
+
+
+def load_lamport_pk_hash(PK_filename):
+    """
+        Carrega només el pk_hash (32 bytes), l'únic que cal per verificar en mode comprimit.
+        Args:   PK_filename (str): Ruta del fitxer de les claus públiques.
+        Return: bytes: pk_hash.
+    """
+
+    with open(PK_filename, "r") as f:
+        return bytes.fromhex(json.load(f)["pk_hash"])
+
+
+def main(compressed=False):
     """
     Genera i guarda claus Lamport. Crea la carpeta 'lamport' i escriu les claus
     generades en fitxers JSON.
+    Args:   compressed (bool): Si és True, el fitxer públic només conté el pk_hash.
     """
 
     os.makedirs("lamport", exist_ok=True)
@@ -90,7 +212,7 @@ def main():
     sk0, sk1, pk0, pk1 = lamport_keygen()
 
     # Guardar
-    save_lamport_key(sk0, sk1, pk0, pk1, SkFile, PkFile)
+    save_lamport_key(sk0, sk1, pk0, pk1, SkFile, PkFile, compressed)
     print(f"Claus Lamport generades i guardades en {SkFile} i {PkFile}")
 
 
@@ -0,0 +1,417 @@
+"""
+Prova de càrrega sostinguda del projecte TFG-PQC.
+
+Reprodueix una càrrega configurable de signatura de transaccions (sign_tx_id +
+save_signature), verificació (verify_signature) i rotació de claus (els main()
+de keygen) durant un temps determinat, i en mesura:
+ - latència p50/p95/p99 i màxima per operació,
+ - throughput,
+ - creixement de la memòria (RSS) del procés,
+ - creixement del fitxer signatures/tx_sig.json.
+
+Amb --rate > 0 les operacions es planifiquen a ritme fix (bucle obert): la latència
+es compta des de l'instant planificat, de manera que inclou el temps d'espera si el
+sistema no dona l'abast. Amb --rate 0 s'executen una rere l'altra tan ràpid com es pot.
+
+Perquè el creixement de RSS mesuri el projecte i no la pròpia prova, les latències
+es guarden en arrays compactes (8 bytes per valor) i les signatures que es
+verifiquen són una mostra de mida fixa (reservoir) de les signades. L'informe
+inclou la memòria que ocupen aquestes dades ('harness_kb').
+
+La prova s'executa dins un directori temporal amb una còpia de la clau ECC, per no
+sobreescriure les claus reals amb les rotacions. L'informe es desa en JSON i es pot
+comparar amb el d'una altra versió.
+
+Ús (des de l'arrel del projecte, amb les claus ja generades per pqc_generator.py):
+    python load_test.py --duration 60 --rate 50 --mix sign=70,verify=25,rotate=5 --out report.json
+    python load_test.py --compare report_v1.json report_v2.json
+"""
+
+import argparse
+import contextlib
+from array import array
+import io
+import json
+import math
+import os
+import random
+import secrets
+import shutil
+import subprocess
+import tempfile
+import time
+
+from ecc.sign_tx import load_private_key, sign_tx_id, save_signature
+from ecc.verify_tx import verify_signature
+from lamport.keygen_lamport import main as generate_lamport_keys
+from wots_plus.keygen_wots_plus import main as generate_wots_keys
+from mss_lots.keygen_mss import main as generate_mss_keys
+
+SK_FILE = "ecc/ecc_private_key_wif.txt"
+SIG_FILE = "signatures/tx_sig.json"
+SIGNED_SAMPLE = 1024  # signatures guardades per verificar (mostra de mida fixa)
+
+ROTATIONS = {
+    "lamport": generate_lamport_keys,
+    "wots_plus": generate_wots_keys,
+    "mss_lots": generate_mss_keys,
+}
+
+
+def parse_mix(text):
+    """
+    Converteix una cadena 'sign=70,verify=25,rotate=5' en pesos per operació.
+    """
+    mix = {}
+    for part in text.split(","):
+        name, weight = part.split("=")
+        if name not in ("sign", "verify", "rotate"):
+            raise ValueError(f"Operació desconeguda: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def read_rss_kb():
+    """
+    Memòria resident del procés actual (Linux, /proc/self/status).
+    Return:
+        int: VmRSS en kB, o None si no es pot llegir.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def file_size(path):
+    """
+    Mida d'un fitxer en bytes (0 si no existeix).
+    """
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def percentile(sorted_values, p):
+    """
+    Percentil pel mètode del rang més proper.
+    Args:
+        sorted_values (list[float]): Valors ordenats.
+        p (float): Percentil (0-100).
+    Return:
+        float: Valor del percentil, o None si no hi ha valors.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(values):
+    """
+    Resum de latències (en ms).
+    """
+    values = sorted(v * 1000 for v in values)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) if values else None,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else None,
+    }
+
+
+def git_version(path):
+    """
+    Versió del codi (commit de git) per identificar l'informe.
+    """
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=path,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_workdir(project_dir, workdir=None):
+    """
+    Prepara el directori de treball amb una còpia de la clau ECC i un fitxer de signatures buit.
+    Args:
+        project_dir (str): Arrel del projecte.
+        workdir (str, optional): Directori a utilitzar. Si és None, se'n crea un de temporal.
+    Return:
+        str: Ruta del directori de treball.
+    """
+    sk_path = os.path.join(project_dir, SK_FILE)
+    if not os.path.exists(sk_path):
+        raise FileNotFoundError(f"No existeix {sk_path}: executa primer pqc_generator.py")
+
+    workdir = workdir or tempfile.mkdtemp(prefix="pqc_load_")
+    for folder in ("ecc", "signatures", *ROTATIONS):
+        os.makedirs(os.path.join(workdir, folder), exist_ok=True)
+    shutil.copy(sk_path, os.path.join(workdir, SK_FILE))
+    if os.path.exists(os.path.join(workdir, SIG_FILE)):
+        os.remove(os.path.join(workdir, SIG_FILE))
+    return workdir
+
+
+def run_load(duration, rate, mix, rotate_schemes, sample_interval=1.0, seed=None):
+    """
+    Executa la càrrega al directori actual.
+    Args:
+        duration (float): Durada de la prova en segons.
+        rate (float): Operacions per segon planificades (0 = bucle tancat, tan ràpid com es pugui).
+        mix (dict): Pes de cada operació ('sign', 'verify', 'rotate').
+        rotate_schemes (list[str]): Esquemes a rotar, per torns.
+        sample_interval (float): Segons entre mostres de RSS i mida del fitxer.
+        seed (int, optional): Llavor per l'elecció d'operacions (reproduïbilitat).
+    Return:
+        dict: Latències, errors, mostres i comptadors.
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    priv = load_private_key(SK_FILE)
+    pk_hex = priv.get_public_key().to_hex(compressed=False)
+    signed = []  # mostra (reservoir) de (tx_id, signature) ja signades, per verificar
+    signed_total = 0
+    rotation = 0
+
+    latencies = {name: array('d') for name in names}  # des de l'instant planificat
+    service = {name: array('d') for name in names}    # temps d'execució de l'operació
+    errors = {name: 0 for name in names}
+    samples = []
+
+    def do_sign():
+        nonlocal signed_total
+        tx_id = secrets.token_hex(32)
+        signature = sign_tx_id(tx_id, priv)
+        save_signature(tx_id, signature, pk_hex, SIG_FILE)
+
+        # Reservoir sampling: cada signatura té la mateixa probabilitat de ser a la mostra
+        signed_total += 1
+        if len(signed) < SIGNED_SAMPLE:
+            signed.append((tx_id, signature))
+        else:
+            slot = rng.randrange(signed_total)
+            if slot < SIGNED_SAMPLE:
+                signed[slot] = (tx_id, signature)
+        return True
+
+    def do_verify():
+        tx_id, signature = signed[rng.randrange(len(signed))]
+        return verify_signature(tx_id, signature, pk_hex)
+
+    def do_rotate():
+        nonlocal rotation
+        ROTATIONS[rotate_schemes[rotation % len(rotate_schemes)]]()
+        rotation += 1
+        return True
+
+    operations = {"sign": do_sign, "verify": do_verify, "rotate": do_rotate}
+
+    # Una signatura inicial perquè verify tingui què verificar (fora del temps mesurat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        do_sign()
+
+    start = time.perf_counter()
+    end = start + duration
+    next_sample = start
+    issued = 0
+
+    while True:
+        now = time.perf_counter()
+        if now >= next_sample:
+            samples.append({
+                "t": now - start,
+                "rss_kb": read_rss_kb(),
+                "sig_file_bytes": file_size(SIG_FILE),
+                "ops": issued,
+            })
+            next_sample += sample_interval
+        if now >= end:
+            break
+
+        if rate > 0:
+            scheduled = start + issued / rate
+            if scheduled >= end:
+                time.sleep(max(0.0, end - now))
+                continue
+            if scheduled > now:
+                time.sleep(min(scheduled - now, max(0.0, next_sample - now)))
+                continue
+        else:
+            scheduled = now
+
+        name = rng.choices(names, weights)[0]
+        issued += 1
+        op_start = time.perf_counter()
+        try:
+            # Els main() i save_signature() escriuen per pantalla a cada crida
+            with contextlib.redirect_stdout(io.StringIO()):
+                ok = operations[name]()
+        except Exception:
+            ok = False
+        op_end = time.perf_counter()
+
+        service[name].append(op_end - op_start)
+        latencies[name].append(op_end - scheduled)
+        if not ok:
+            errors[name] += 1
+
+    harness_bytes = sum(values.itemsize * len(values)
+                        for values in (*latencies.values(), *service.values()))
+    return {
+        "elapsed": time.perf_counter() - start,
+        "harness_kb": harness_bytes // 1024,
+        "latencies": latencies,
+        "service": service,
+        "errors": errors,
+        "samples": samples,
+    }
+
+
+def build_report(result, config, version):
+    """
+    Construeix l'informe JSON a partir dels resultats d'una prova.
+    """
+    samples = result["samples"]
+    total = sum(len(v) for v in result["latencies"].values())
+    rss = [s["rss_kb"] for s in samples if s["rss_kb"] is not None]
+
+    return {
+        "version": version,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+        "elapsed_s": result["elapsed"],
+        "operations": total,
+        "throughput_ops_s": total / result["elapsed"] if result["elapsed"] else 0.0,
+        "ops": {
+            name: {
+                "latency": summarize(values),
+                "service": summarize(result["service"][name]),
+                "errors": result["errors"][name],
+                "throughput_ops_s": len(values) / result["elapsed"] if result["elapsed"] else 0.0,
+            }
+            for name, values in result["latencies"].items()
+        },
+        "rss_start_kb": rss[0] if rss else None,
+        "rss_end_kb": rss[-1] if rss else None,
+        "rss_growth_kb": rss[-1] - rss[0] if rss else None,
+        "harness_kb": result["harness_kb"],
+        "sig_file_growth_bytes": samples[-1]["sig_file_bytes"] - samples[0]["sig_file_bytes"] if samples else 0,
+        "samples": samples,
+    }
+
+
+def print_report(report):
+    """
+    Mostra un resum de l'informe.
+    """
+    print(f"Versió: {report['version']}  durada: {report['elapsed_s']:.1f} s  "
+          f"operacions: {report['operations']}  throughput: {report['throughput_ops_s']:.1f} ops/s")
+    for name, op in report["ops"].items():
+        lat = op["latency"]
+        if lat["count"] == 0:
+            continue
+        print(f"  {name:<7} n={lat['count']:<6} p50={lat['p50_ms']:.2f} ms  p95={lat['p95_ms']:.2f} ms  "
+              f"p99={lat['p99_ms']:.2f} ms  max={lat['max_ms']:.2f} ms  errors={op['errors']}")
+    print(f"  RSS: {report['rss_start_kb']} kB -> {report['rss_end_kb']} kB ({report['rss_growth_kb']:+} kB, "
+          f"dels quals {report['harness_kb']} kB són latències de la prova)")
+    print(f"  {SIG_FILE}: +{report['sig_file_growth_bytes']} bytes")
+
+
+def compare_reports(path_a, path_b):
+    """
+    Compara dos informes (per exemple, de dues versions) i mostra la variació.
+    """
+    with open(path_a, "r") as f:
+        a = json.load(f)
+    with open(path_b, "r") as f:
+        b = json.load(f)
+
+    def delta(x, y):
+        if x is None or y is None:
+            return "   n/a"
+        return f"{(y - x) / x * 100:+6.1f}%" if x else "   n/a"
+
+    print(f"A: {path_a} ({a['version']})")
+    print(f"B: {path_b} ({b['version']})")
+    print(f"throughput: {a['throughput_ops_s']:.1f} -> {b['throughput_ops_s']:.1f} ops/s "
+          f"{delta(a['throughput_ops_s'], b['throughput_ops_s'])}")
+    for name in sorted(set(a["ops"]) | set(b["ops"])):
+        lat_a = a["ops"].get(name, {}).get("latency", {})
+        lat_b = b["ops"].get(name, {}).get("latency", {})
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            x, y = lat_a.get(key), lat_b.get(key)
+            if x is None and y is None:
+                continue
+            fx = f"{x:.2f}" if x is not None else "n/a"
+            fy = f"{y:.2f}" if y is not None else "n/a"
+            print(f"  {name:<7} {key}: {fx} -> {fy} ms {delta(x, y)}")
+    print(f"RSS growth: {a['rss_growth_kb']} -> {b['rss_growth_kb']} kB")
+    print(f"{SIG_FILE} growth: {a['sig_file_growth_bytes']} -> {b['sig_file_growth_bytes']} bytes")
+
+
+def main():
+    """
+    Executa la prova de càrrega (o compara dos informes) segons els arguments.
+    """
+
+    parser = argparse.ArgumentParser(description="Prova de càrrega sostinguda TFG-PQC")
+    parser.add_argument("--duration", type=float, default=30.0, help="segons de prova")
+    parser.add_argument("--rate", type=float, default=0.0, help="operacions/s planificades (0 = bucle tancat)")
+    parser.add_argument("--mix", default="sign=70,verify=25,rotate=5", help="pesos de cada operació")
+    parser.add_argument("--rotate", default="lamport,wots_plus,mss_lots",
+                        help=f"esquemes a rotar ({', '.join(ROTATIONS)})")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="segons entre mostres de RSS")
+    parser.add_argument("--seed", type=int, default=None, help="llavor per reproduir la seqüència d'operacions")
+    parser.add_argument("--workdir", default=None, help="directori de treball (per defecte, un de temporal)")
+    parser.add_argument("--out", default=None, help="fitxer JSON de l'informe")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="compara dos informes i surt")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_reports(*args.compare)
+        return
+
+    rotate_schemes = args.rotate.split(",")
+    for scheme in rotate_schemes:
+        if scheme not in ROTATIONS:
+            parser.error(f"Esquema de rotació desconegut: {scheme}")
+
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    out = os.path.abspath(args.out or f"load_report_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    config = {
+        "duration_s": args.duration,
+        "rate_ops_s": args.rate,
+        "mix": parse_mix(args.mix),
+        "rotate": rotate_schemes,
+        "sample_interval_s": args.sample_interval,
+        "seed": args.seed,
+    }
+
+    workdir = prepare_workdir(project_dir, args.workdir)
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        result = run_load(args.duration, args.rate, config["mix"], rotate_schemes,
+                          args.sample_interval, args.seed)
+    finally:
+        os.chdir(previous_dir)
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = build_report(result, config, git_version(project_dir))
+    with open(out, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print_report(report)
+    print(f"Informe guardat a {out}")
+
+
+if __name__ == "__main__":
+    main()
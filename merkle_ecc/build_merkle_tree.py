@@ -35,6 +35,17 @@ def get_auth_path(tree, index):
         index //= 2
     return path
 
+# Recalcula l’arrel a partir d’una fulla i els seus complementaris
+def root_from_auth_path(leaf, index, path):
+    node = leaf
+    for sibling in path:
+        if index % 2 == 0:
+            node = H(node + sibling)
+        else:
+            node = H(sibling + node)
+        index //= 2
+    return node
+
 # Guarda l’arrel, fulles i complementaris
 def save_merkle_data(scheme_names, leaves, tree, path="merkle_ecc/root_merkle.json"):
     
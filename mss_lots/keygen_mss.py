@@ -2,6 +2,14 @@ import hashlib
 import secrets
 import json
 import os
+import time
+import argparse
+
+from lamport.keygen_lamport import lamport_sign, lamport_verify
+from mss_lots.tree_store import (
+    save_tree_file, save_tree_file_from_leaves, open_tree_file, close_tree_file,
+    get_auth_path_from_file, read_node, tree_root, NODE_SIZE,
+)
 
 # Nombre de bits que es volen signar amb Lamport (normalment SHA-256 → 256 bits)
 N_BITS = 256
@@ -31,6 +39,23 @@ def lamport_keygen():
         pk1.append(H(s1))
     return sk0, sk1, pk0, pk1
 
+def lamport_keygen_from_seed(seed, index):
+    """
+    Deriva de forma determinista la clau Lamport de la fulla 'index' a partir d'una llavor mestra.
+    Permet regenerar qualsevol fulla sense guardar totes les claus secretes.
+    Args:
+        seed (bytes): Llavor mestra secreta.
+        index (int): Índex de la fulla.
+    Return:
+        tuple: Llistes de claus secretes i públiques (sk0, sk1, pk0, pk1).
+    """
+    prefix = seed + index.to_bytes(4, 'big')
+    sk0 = [H(prefix + b'\x00' + j.to_bytes(2, 'big')) for j in range(N_BITS)]
+    sk1 = [H(prefix + b'\x01' + j.to_bytes(2, 'big')) for j in range(N_BITS)]
+    pk0 = [H(s0) for s0 in sk0]
+    pk1 = [H(s1) for s1 in sk1]
+    return sk0, sk1, pk0, pk1
+
 def hash_lamport_pk(pk0, pk1):
     """
     Agrega i fa hash de la clau pública Lamport.
@@ -43,6 +68,25 @@ def hash_lamport_pk(pk0, pk1):
     data = b''.join(pk0 + pk1)
     return H(data)
 
+class SeedLamportKeys:
+    """
+    Claus Lamport d'una clau MSS generada a partir d'una llavor. Es fa servir com la llista
+    de claus de mss_keygen(), però cada fulla es deriva en el moment amb
+    lamport_keygen_from_seed(): la memòria no depèn del nombre de fulles.
+    """
+
+    def __init__(self, seed, h):
+        self.seed = seed
+        self.h = h
+
+    def __len__(self):
+        return 2**self.h
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(f"Fulla fora de rang: {index}")
+        return lamport_keygen_from_seed(self.seed, index)
+
 def build_merkle_tree(leaf_nodes):
     """
     Construeix un arbre de Merkle a partir dels fulles.
@@ -78,12 +122,33 @@ def get_auth_path(tree, index):
         index //= 2
     return path
 
+def root_from_auth_path(leaf, index, auth_path):
+    """
+    Recalcula l'arrel de Merkle a partir d'una fulla i el seu camí d'autenticació.
+    Args:
+        leaf (bytes): Hash de la fulla.
+        index (int): Índex de la fulla.
+        auth_path (list[bytes]): Nodes germans des de la fulla fins a l'arrel.
+    Return:
+        bytes: Arrel recalculada.
+    """
+    node = leaf
+    for sibling in auth_path:
+        if index % 2 == 0:
+            node = H(node + sibling)
+        else:
+            node = H(sibling + node)
+        index //= 2
+    return node
+
 # Generació de totes les claus (Lamport) i arbre de Merkle
-def mss_keygen(h=4):
+def mss_keygen(h=4, seed=None):
     """
     Genera claus Lamport i construeix l’arbre de Merkle (MSS).
     Args:
         h (int): Alçada de l’arbre de Merkle (2^h fulles).
+        seed (bytes, optional): Llavor mestra. Si es dona, les claus es deriven amb
+            lamport_keygen_from_seed(); si és None, són aleatòries.
     Return:
         tuple: (lamport_keys, tree, root) per signatura i verificació.
     """
@@ -91,8 +156,11 @@ def mss_keygen(h=4):
     lamport_keys = []
     leaf_hashes = []
 
-    for _ in range(num_keys):
-        sk0, sk1, pk0, pk1 = lamport_keygen()
+    for i in range(num_keys):
+        if seed is None:
+            sk0, sk1, pk0, pk1 = lamport_keygen()
+        else:
+            sk0, sk1, pk0, pk1 = lamport_keygen_from_seed(seed, i)
         lamport_keys.append((sk0, sk1, pk0, pk1))
         leaf_hashes.append(hash_lamport_pk(pk0, pk1))
 
@@ -100,6 +168,264 @@ def mss_keygen(h=4):
     root = tree[-1][0]  # l’arrel és l’únic node de l’últim nivell
     return lamport_keys, tree, root
 
+def save_checkpoint(path, h, seed, next_leaf, stack):
+    """
+    Guarda el progrés de la generació de forma atòmica (fitxer temporal + rename).
+    El checkpoint conté la llavor mestra: s'ha de protegir igual que la clau privada.
+    Args:
+        path (str): Fitxer de checkpoint.
+        h (int): Alçada de l'arbre.
+        seed (bytes): Llavor mestra.
+        next_leaf (int): Primera fulla encara no processada.
+        stack (list[tuple[int, bytes]]): Pila del treehash (alçada, node).
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "h": h,
+            "seed": seed.hex(),
+            "next_leaf": next_leaf,
+            "stack": [[height, node.hex()] for height, node in stack]
+        }, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    """
+    Carrega un checkpoint de save_checkpoint().
+    Return:
+        tuple: (h, seed, next_leaf, stack)
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    stack = [(height, bytes.fromhex(node)) for height, node in data["stack"]]
+    return data["h"], bytes.fromhex(data["seed"]), data["next_leaf"], stack
+
+def mss_keygen_checkpointed(h, checkpoint_file, tree_file, checkpoint_interval=1024, resume=False, seed=None):
+    """
+    Calcula l'arrel MSS amb treehash (memòria O(h)) i guarda un checkpoint periòdicament.
+    Les fulles es van escrivint a un fitxer auxiliar (checkpoint_file + ".leaves") i, en acabar,
+    es construeix el fitxer de l'arbre a partir d'aquest amb save_tree_file_from_leaves().
+    Les claus es deriven de la llavor mestra, de manera que en reprendre des d'un
+    checkpoint s'obté la mateixa arrel que amb mss_keygen(h, seed).
+    El checkpoint no s'esborra aquí: cal cridar remove_checkpoint() un cop desades les claus.
+    Args:
+        h (int): Alçada de l'arbre (2^h fulles).
+        checkpoint_file (str): Fitxer de checkpoint.
+        tree_file (str): Fitxer de l'arbre (format de tree_store).
+        checkpoint_interval (int): Fulles entre checkpoints.
+        resume (bool): Si és True i existeix el checkpoint, continua des d'aquest.
+        seed (bytes, optional): Llavor mestra per una generació nova. Si és None, és aleatòria.
+    Return:
+        tuple: (seed, root, stats)
+            stats (dict): Fulles generades, checkpoints escrits i temps dedicat als checkpoints.
+    """
+    leaves_file = checkpoint_file + ".leaves"
+    next_leaf, stack = 0, []
+    if resume and os.path.exists(checkpoint_file):
+        saved_h, seed, next_leaf, stack = load_checkpoint(checkpoint_file)
+        if saved_h != h:
+            raise ValueError(f"El checkpoint és d'un arbre d'alçada {saved_h}, no {h}")
+        if not os.path.exists(leaves_file) or os.path.getsize(leaves_file) < next_leaf * NODE_SIZE:
+            raise ValueError(f"Falten fulles a {leaves_file} per reprendre el checkpoint")
+        leaves = open(leaves_file, "r+b")
+        # Les fulles escrites després de l'últim checkpoint es tornen a generar
+        leaves.truncate(next_leaf * NODE_SIZE)
+        leaves.seek(0, os.SEEK_END)
+    else:
+        if seed is None:
+            seed = secrets.token_bytes(SEED_SIZE)
+        leaves = open(leaves_file, "wb")
+
+    stats = {"resumed_from": next_leaf, "leaves": 0, "checkpoints": 0, "checkpoint_seconds": 0.0}
+    start = time.perf_counter()
+
+    with leaves:
+        for i in range(next_leaf, 2**h):
+            _, _, pk0, pk1 = lamport_keygen_from_seed(seed, i)
+            node, height = hash_lamport_pk(pk0, pk1), 0
+            leaves.write(node)
+
+            # Treehash: mentre el node del cim de la pila té la mateixa alçada, es combinen
+            while stack and stack[-1][0] == height:
+                _, left = stack.pop()
+                node, height = H(left + node), height + 1
+            stack.append((height, node))
+            stats["leaves"] += 1
+
+            # També es desa un checkpoint a la darrera fulla: si falla el que ve després
+            # (arbre o claus), en reprendre no cal tornar a generar cap fulla
+            if (i + 1) % checkpoint_interval == 0 or i + 1 == 2**h:
+                checkpoint_start = time.perf_counter()
+                leaves.flush()
+                os.fsync(leaves.fileno())
+                save_checkpoint(checkpoint_file, h, seed, i + 1, stack)
+                stats["checkpoint_seconds"] += time.perf_counter() - checkpoint_start
+                stats["checkpoints"] += 1
+
+    root = stack[0][1]
+    tree_start = time.perf_counter()
+    if save_tree_file_from_leaves(leaves_file, tree_file) != root:
+        raise ValueError(f"L'arbre de {tree_file} no coincideix amb l'arrel del treehash")
+    stats["tree_seconds"] = time.perf_counter() - tree_start
+
+    stats["total_seconds"] = time.perf_counter() - start
+    stats["checkpoint_overhead"] = (stats["checkpoint_seconds"] / stats["total_seconds"]
+                                    if stats["total_seconds"] else 0.0)
+    return seed, root, stats
+
+def remove_checkpoint(checkpoint_file):
+    """
+    Esborra el checkpoint i el fitxer auxiliar de fulles de mss_keygen_checkpointed().
+    Només s'ha de cridar quan les claus ja s'han desat.
+    """
+    for path in (checkpoint_file, checkpoint_file + ".leaves"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def mss_sign(message, index, lamport_keys, tree):
+    """
+    Signa un missatge amb la fulla 'index' de l'arbre. Cada fulla només s'ha de fer servir una vegada.
+    Args:
+        message (bytes): Missatge a signar.
+        index (int): Índex de la fulla (clau Lamport) a utilitzar.
+        lamport_keys (list): Claus Lamport de l'arbre.
+        tree (list[list[bytes]] | dict): Arbre de Merkle en memòria o magatzem de open_tree_file().
+    Return:
+        dict: Signatura amb 'index', 'lamport_sig', 'pk0', 'pk1' i 'auth_path'.
+    """
+    sk0, sk1, pk0, pk1 = lamport_keys[index]
+    if isinstance(tree, dict):
+        auth_path = get_auth_path_from_file(tree, index)
+    else:
+        auth_path = get_auth_path(tree, index)
+    return {
+        "index": index,
+        "lamport_sig": lamport_sign(message, sk0, sk1),
+        "pk0": pk0,
+        "pk1": pk1,
+        "auth_path": auth_path,
+    }
+
+def valid_leaf_index(signature, h=None):
+    """
+    Comprova que l'índex de la signatura és una fulla de l'arbre: 0 <= index < 2^len(auth_path)
+    i, si es coneix l'alçada, len(auth_path) == h. Sense aquesta comprovació,
+    index + k·2^h també verificaria i una mateixa fulla apareixeria amb diversos índexs.
+    Args:
+        signature (dict): Signatura amb 'index' i 'auth_path'.
+        h (int, optional): Alçada de l'arbre.
+    Return:
+        bool: True si l'índex és vàlid.
+    """
+    path_len = len(signature["auth_path"])
+    if h is not None and path_len != h:
+        return False
+    return 0 <= signature["index"] < 2**path_len
+
+def mss_verify(message, signature, root, h=None):
+    """
+    Verifica una signatura MSS: primer l'índex de la fulla, després la signatura Lamport
+    i finalment l'auth_path fins a l'arrel.
+    Args:
+        message (bytes): Missatge signat.
+        signature (dict): Signatura retornada per mss_sign().
+        root (bytes): Arrel de l'arbre de Merkle.
+        h (int, optional): Alçada de l'arbre; si es dona, l'auth_path ha de tenir h nodes.
+    Return:
+        bool: True si la signatura és vàlida.
+    """
+    if not valid_leaf_index(signature, h):
+        return False
+    pk0, pk1 = signature["pk0"], signature["pk1"]
+    if not lamport_verify(message, signature["lamport_sig"], pk0, pk1):
+        return False
+    leaf = hash_lamport_pk(pk0, pk1)
+    return root_from_auth_path(leaf, signature["index"], signature["auth_path"]) == root
+
+def mss_batch_verify(items, h=None):
+    """
+    Verifica moltes signatures MSS reaprofitant els nodes interns ja autenticats.
+    Les signatures s'agrupen per arrel i s'ordenen per índex de fulla. Per cada nivell es
+    guarden els nodes del darrer camí vàlid (node i germà), que estan autenticats per l'arrel.
+    Quan una signatura arriba a un node ja autenticat, es comparen el node i la resta de germans
+    de l'auth_path amb els de la cache i no cal tornar a fer hash cap amunt; així els nivells
+    superiors es calculen una sola vegada per lot, la memòria és O(h) i el resultat és el mateix
+    que el de mss_verify().
+    Args:
+        items (list[tuple]): Llista de (message, signature, root).
+        h (int, optional): Alçada de l'arbre, com a mss_verify().
+    Return:
+        tuple: (results, stats)
+            results (list[bool]): Resultat de cada signatura, en l'ordre d'entrada.
+            stats (dict): Hashes de l'auth_path calculats i estalviats respecte a mss_verify().
+    """
+    results = [False] * len(items)
+    stats = {"path_hashes": 0, "path_hashes_saved": 0, "cache_hits": 0}
+
+    groups = {}
+    for pos, (_, signature, root) in enumerate(items):
+        groups.setdefault(root, []).append(pos)
+
+    for root, positions in groups.items():
+        positions.sort(key=lambda pos: items[pos][1]["index"])
+        cache = {}  # nivell -> {índex: node autenticat}
+
+        for pos in positions:
+            message, signature, _ = items[pos]
+            if not valid_leaf_index(signature, h):
+                continue
+            pk0, pk1 = signature["pk0"], signature["pk1"]
+            if not lamport_verify(message, signature["lamport_sig"], pk0, pk1):
+                continue
+
+            auth_path = signature["auth_path"]
+            index = signature["index"]
+            node = hash_lamport_pk(pk0, pk1)
+            computed = []  # (nivell, índex, node, germà)
+            valid = None
+
+            for level, sibling in enumerate(auth_path):
+                cached = cache.get(level, {}).get(index) if len(auth_path) == len(cache) else None
+                if cached is not None:
+                    # La resta de l'auth_path ha de coincidir amb els germans ja autenticats
+                    valid = cached == node and all(
+                        cache[upper][(index >> (upper - level)) ^ 1] == auth_path[upper]
+                        for upper in range(level, len(auth_path))
+                    )
+                    stats["cache_hits"] += 1
+                    stats["path_hashes_saved"] += len(auth_path) - level
+                    break
+                computed.append((level, index, node, sibling))
+                if index % 2 == 0:
+                    node = H(node + sibling)
+                else:
+                    node = H(sibling + node)
+                stats["path_hashes"] += 1
+                index //= 2
+            else:
+                valid = node == root
+
+            if valid:
+                # Els nivells per sota del punt de trobada passen a ser el camí autenticat
+                for level, idx, value, sibling in computed:
+                    cache[level] = {idx: value, idx ^ 1: sibling}
+            results[pos] = valid
+
+    return results, stats
+
+def write_json_atomic(path, data):
+    """
+    Escriu un fitxer JSON de forma atòmica (fitxer temporal + rename).
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
 # Guarda claus privades i arrel de Merkle en fitxers JSON
 def save_mss_keys(lamport_keys, root, sk_filename, pk_filename):
     """
@@ -135,9 +461,83 @@ def save_mss_keys(lamport_keys, root, sk_filename, pk_filename):
         json.dump(public_data, f, indent=4)
 
 
-def main():
+def save_mss_seed_keys(seed, h, root, sk_filename, pk_filename):
     """
-    Genera claus MSS (Lamport + Merkle) i les guarda en fitxers JSON.
+    Guarda una clau MSS generada a partir d'una llavor: només la llavor i l'alçada
+    a la part privada (les claus Lamport es deriven amb lamport_keygen_from_seed()).
+    Els dos fitxers s'escriuen de forma atòmica.
+    Args:
+        seed (bytes): Llavor mestra.
+        h (int): Alçada de l'arbre.
+        root (bytes): Arrel de l’arbre Merkle.
+        sk_filename (str): Fitxer per la clau privada.
+        pk_filename (str): Fitxer per la clau pública.
+    """
+
+    write_json_atomic(sk_filename, {"seed": seed.hex(), "h": h})
+    write_json_atomic(pk_filename, {
+        "pk_hash": H(root).hex(),
+        "root": root.hex()
+    })
+
+
+def load_mss_keys(sk_filename, pk_filename, tree_filename=None):
+    """
+    Carrega les claus MSS des dels fitxers JSON. Si existeix el fitxer de l'arbre,
+    l'obre amb mmap (open_tree_file()) en lloc de reconstruir l'arbre; en aquest cas
+    el magatzem retornat s'ha de tancar amb close_tree_file().
+    Args:
+        sk_filename (str): Fitxer amb la clau privada.
+        pk_filename (str): Fitxer amb la clau pública.
+        tree_filename (str, optional): Fitxer de l'arbre escrit amb save_tree_file().
+    Return:
+        tuple: (lamport_keys, tree, root)
+            tree (list[list[bytes]] | dict): Arbre en memòria o magatzem del fitxer.
+    """
+
+    with open(sk_filename, "r") as f:
+        private_data = json.load(f)
+    with open(pk_filename, "r") as f:
+        public_data = json.load(f)
+
+    if "seed" in private_data:
+        # Les claus es deriven fulla a fulla quan es fan servir
+        lamport_keys = SeedLamportKeys(bytes.fromhex(private_data["seed"]), private_data["h"])
+    else:
+        lamport_keys = [
+            tuple([bytes.fromhex(x) for x in key[part]] for part in ("sk0", "sk1", "pk0", "pk1"))
+            for key in private_data["lamport_keys"]
+        ]
+
+    if tree_filename is not None and os.path.exists(tree_filename):
+        tree = open_tree_file(tree_filename)
+        root = tree_root(tree)
+        # Comprovació barata que l'arbre és d'aquestes claus: alçada i primera fulla
+        _, _, pk0, pk1 = lamport_keys[0]
+        if len(lamport_keys) != 2**tree["h"] or read_node(tree, 0, 0) != hash_lamport_pk(pk0, pk1):
+            close_tree_file(tree)
+            raise ValueError(f"L'arbre de {tree_filename} no correspon a les claus privades")
+    else:
+        tree = build_merkle_tree([hash_lamport_pk(pk0, pk1) for (_, _, pk0, pk1) in lamport_keys])
+        root = tree[-1][0]
+
+    if root.hex() != public_data["root"]:
+        if isinstance(tree, dict):
+            close_tree_file(tree)
+        raise ValueError("L'arrel de la clau pública no coincideix amb les claus privades")
+    return lamport_keys, tree, root
+
+
+def main(h=3, checkpoint_interval=None, resume=False):
+    """
+    Genera claus MSS (Lamport + Merkle), les guarda en fitxers JSON
+    i desa l'arbre complet en un fitxer binari per poder-lo obrir amb mmap.
+    Amb checkpoint_interval o resume, fa servir la generació amb checkpoints (per arbres grans):
+    es guarda la llavor i l'arrel, i l'arbre es construeix a partir de les fulles escrites a disc.
+    Args:
+        h (int): Alçada de l'arbre (2^h fulles).
+        checkpoint_interval (int, optional): Fulles entre checkpoints.
+        resume (bool): Continua des de l'últim checkpoint si existeix.
     """
     
     os.makedirs("mss_lots", exist_ok=True)
@@ -145,13 +545,36 @@ def main():
     # Fitxers on es guarden les claus
     SkFile = "mss_lots/sk_MSS.json"
     PkFile = "mss_lots/pk_MSS.json"
+    TreeFile = "mss_lots/tree_MSS.bin"
+    CheckpointFile = "mss_lots/checkpoint_MSS.json"
+
+    if checkpoint_interval is not None or resume:
+        seed, root, stats = mss_keygen_checkpointed(h, CheckpointFile, TreeFile,
+                                                    checkpoint_interval or 1024, resume)
+        save_mss_seed_keys(seed, h, root, SkFile, PkFile)
+        remove_checkpoint(CheckpointFile)
+        print(f"Claus MSS generades i guardades en {SkFile} i {PkFile}")
+        print(f"Arbre MSS guardat en {TreeFile} ({stats['tree_seconds']:.2f} s)")
+        print(f"Fulles generades: {stats['leaves']} (des de la fulla {stats['resumed_from']}), "
+              f"checkpoints: {stats['checkpoints']}, "
+              f"temps en checkpoints: {stats['checkpoint_seconds']:.3f} s "
+              f"({stats['checkpoint_overhead'] * 100:.2f}% de {stats['total_seconds']:.2f} s)")
+        return
 
     # Generació
-    lamport_keys, tree, root = mss_keygen(h=3)  # 2^3 = 8 claus Lamport (fulles)
+    lamport_keys, tree, root = mss_keygen(h=h)  # 2^3 = 8 claus Lamport (fulles) per defecte
 
     # Guardar
     save_mss_keys(lamport_keys, root, SkFile, PkFile)
+    save_tree_file(tree[0], TreeFile)
     print(f"Claus MSS generades i guardades en {SkFile} i {PkFile}")
+    print(f"Arbre MSS guardat en {TreeFile}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generació de claus MSS")
+    parser.add_argument("--h", type=int, default=3, help="alçada de l'arbre (2^h fulles)")
+    parser.add_argument("--checkpoint-interval", type=int, default=None,
+                        help="fulles entre checkpoints (activa la generació amb checkpoints)")
+    parser.add_argument("--resume", action="store_true", help="continua des de l'últim checkpoint")
+    args = parser.parse_args()
+    main(args.h, args.checkpoint_interval, args.resume)
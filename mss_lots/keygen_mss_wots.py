@@ -0,0 +1,319 @@
+"""
+Variant de MSS a l'estil XMSS: cada fulla és una clau WOTS+ (en lloc de Lamport)
+i la clau pública de cada fulla es comprimeix amb un L-tree amb màscares.
+Les màscares es deriven d'una llavor pública i pk_hash = H(arrel || llavor pública).
+
+Ús (des de l'arrel del projecte):
+    python -m mss_lots.keygen_mss_wots
+"""
+
+import hashlib
+import secrets
+import json
+import math
+import os
+
+from wots_plus.keygen_wots_plus import (
+    W, N, SEED_SIZE,
+    wots_params, wots_plus_keygen, wots_plus_sign, wots_plus_pk_from_sig,
+)
+from mss_lots.keygen_mss import (
+    build_merkle_tree, get_auth_path, root_from_auth_path, valid_leaf_index, write_json_atomic,
+)
+from mss_lots.tree_store import (
+    save_tree_file, open_tree_file, close_tree_file, get_auth_path_from_file, tree_root,
+)
+
+
+def H(data):
+    """
+    Descripció: Aplica SHA-256 sobre les dades d'entrada.
+    Args: data (bytes): Dades a hashejar.
+    Return: bytes: Digest SHA-256.
+    """
+    return hashlib.sha256(data).digest()
+
+def xor(a, b):
+    """
+    XOR de dues cadenes de la mateixa mida (com a enters, molt més ràpid que byte a byte).
+    """
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+def leaf_seed(seed, index):
+    """
+    Deriva la llavor WOTS+ de la fulla 'index' a partir de la llavor mestra.
+    Args:
+        seed (bytes): Llavor mestra secreta.
+        index (int): Índex de la fulla.
+    Return:
+        bytes: Llavor de la clau WOTS+ de la fulla.
+    """
+    return H(seed + index.to_bytes(4, 'big'))
+
+def ltree_height(L):
+    """
+    Nombre de nivells de l'L-tree per una clau pública de L elements.
+    """
+    return math.ceil(math.log2(L))
+
+def ltree(pk, ltree_masks):
+    """
+    Comprimeix una clau pública WOTS+ en un sol node amb un L-tree amb màscares.
+    Si un nivell té un nombre senar de nodes, l'últim puja directament al nivell següent.
+    Args:
+        pk (list[bytes]): Clau pública WOTS+ (L elements).
+        ltree_masks (list[tuple[bytes, bytes]]): Parell de màscares (esquerra, dreta) per nivell.
+    Return:
+        bytes: Node arrel de l'L-tree (fulla de l'arbre MSS).
+    """
+    nodes = list(pk)
+    level = 0
+    while len(nodes) > 1:
+        mask_l, mask_r = ltree_masks[level]
+        new_level = [H(xor(nodes[i], mask_l) + xor(nodes[i + 1], mask_r))
+                     for i in range(0, len(nodes) - 1, 2)]
+        if len(nodes) % 2 == 1:
+            new_level.append(nodes[-1])
+        nodes = new_level
+        level += 1
+    return nodes[0]
+
+# Generació de totes les fulles (WOTS+ + L-tree) i arbre de Merkle
+def derive_masks(public_seed, w=W, n=N):
+    """
+    Deriva totes les màscares públiques a partir de la llavor pública (com a XMSS).
+    Com que el pk_hash es compromet amb la llavor pública, el verificador reconstrueix
+    les màscares i no pot acceptar màscares escollides per un atacant.
+    Args:
+        public_seed (bytes): Llavor pública de la clau.
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
+    Return:
+        tuple: (r_masks, ltree_masks)
+            r_masks (list[list[bytes]]): Màscares de les cadenes WOTS+ (L x (w-1)).
+            ltree_masks (list[tuple[bytes, bytes]]): Parell de màscares per nivell de l'L-tree.
+    """
+    _, _, _, L = wots_params(w, n)
+    r_masks = [[H(public_seed + b"chain" + i.to_bytes(2, 'big') + j.to_bytes(2, 'big'))
+                for j in range(w - 1)] for i in range(L)]
+    ltree_masks = [(H(public_seed + b"ltree" + level.to_bytes(2, 'big') + b"L"),
+                    H(public_seed + b"ltree" + level.to_bytes(2, 'big') + b"R"))
+                   for level in range(ltree_height(L))]
+    return r_masks, ltree_masks
+
+def mss_wots_pk_hash(root, public_seed):
+    """
+    Hash de la clau pública (fulla de merkle_ecc): es compromet amb l'arrel i amb la llavor pública.
+    """
+    return H(root + public_seed)
+
+def mss_wots_keygen(h=4, w=W, n=N, seed=None, public_seed=None):
+    """
+    Genera una clau MSS amb fulles WOTS+ comprimides amb L-tree.
+    Les màscares de les cadenes i de l'L-tree es deriven de la llavor pública i són
+    compartides per totes les fulles; les claus secretes es deriven de la llavor mestra,
+    de manera que no cal guardar-les.
+    Args:
+        h (int): Alçada de l'arbre de Merkle (2^h fulles).
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
+        seed (bytes, optional): Llavor mestra secreta. Si és None, es genera aleatòriament.
+        public_seed (bytes, optional): Llavor pública. Si és None, es genera aleatòriament.
+    Return:
+        tuple: (seed, public_seed, tree, root)
+    """
+    if seed is None:
+        seed = secrets.token_bytes(SEED_SIZE)
+    if public_seed is None:
+        public_seed = secrets.token_bytes(SEED_SIZE)
+
+    r_masks, ltree_masks = derive_masks(public_seed, w, n)
+
+    leaves = []
+    for i in range(2**h):
+        _, _, pk, _ = wots_plus_keygen(leaf_seed(seed, i), w, n, r_masks)
+        leaves.append(ltree(pk, ltree_masks))
+
+    tree = build_merkle_tree(leaves)
+    root = tree[-1][0]
+    return seed, public_seed, tree, root
+
+def mss_wots_sign(message, index, seed, public_seed, tree, w=W, n=N):
+    """
+    Signa un missatge amb la fulla 'index'. Cada fulla només s'ha de fer servir una vegada
+    (vegeu mss_wots_sign_next(), que porta el comptador a disc).
+    Args:
+        message (bytes): Missatge a signar.
+        index (int): Índex de la fulla.
+        seed (bytes): Llavor mestra.
+        public_seed (bytes): Llavor pública.
+        tree (list[list[bytes]] | dict): Arbre de Merkle en memòria o magatzem de open_tree_file().
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
+    Return:
+        dict: Signatura amb 'index', 'wots_sig' i 'auth_path'.
+    """
+    r_masks, _ = derive_masks(public_seed, w, n)
+    sk, _, _, _ = wots_plus_keygen(leaf_seed(seed, index), w, n, r_masks)
+    if isinstance(tree, dict):
+        auth_path = get_auth_path_from_file(tree, index)
+    else:
+        auth_path = get_auth_path(tree, index)
+    return {
+        "index": index,
+        "wots_sig": wots_plus_sign(message, sk, r_masks, w, n),
+        "auth_path": auth_path,
+    }
+
+def mss_wots_verify(message, signature, root, public_seed, w=W, n=N, h=None):
+    """
+    Verifica una signatura MSS amb fulles WOTS+. Les màscares es reconstrueixen a partir
+    de la llavor pública; qui confia en el pk_hash ha de comprovar abans que
+    mss_wots_pk_hash(root, public_seed) hi coincideix.
+    Args:
+        message (bytes): Missatge signat.
+        signature (dict): Signatura retornada per mss_wots_sign().
+        root (bytes): Arrel de l'arbre de Merkle.
+        public_seed (bytes): Llavor pública.
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
+        h (int, optional): Alçada de l'arbre; si es dona, l'auth_path ha de tenir h nodes.
+    Return:
+        bool: True si la signatura és vàlida.
+    """
+    _, _, _, L = wots_params(w, n)
+    if len(signature["wots_sig"]) != L or not valid_leaf_index(signature, h):
+        return False
+    r_masks, ltree_masks = derive_masks(public_seed, w, n)
+    pk = wots_plus_pk_from_sig(message, signature["wots_sig"], r_masks, w, n)
+    leaf = ltree(pk, ltree_masks)
+    return root_from_auth_path(leaf, signature["index"], signature["auth_path"]) == root
+
+def signature_size(h=4, w=W, n=N):
+    """
+    Mida en bytes d'una signatura (índex de 4 bytes + signatura WOTS+ + auth path).
+    """
+    _, _, _, L = wots_params(w, n)
+    return 4 + L * SEED_SIZE + h * SEED_SIZE
+
+# Guarda les llavors i les dades públiques en fitxers JSON
+def save_mss_wots_keys(seed, public_seed, root, sk_filename, pk_filename, h=4, w=W, n=N, next_index=0):
+    """
+    Guarda la clau MSS-WOTS+ en fitxers JSON. El fitxer públic té el camp 'pk_hash'
+    com la resta d'esquemes, per poder-lo fer servir com a fulla a merkle_ecc.
+    Args:
+        seed (bytes): Llavor mestra secreta.
+        public_seed (bytes): Llavor pública (de la qual es deriven les màscares).
+        root (bytes): Arrel de l'arbre Merkle.
+        sk_filename (str): Fitxer per la clau privada.
+        pk_filename (str): Fitxer per la clau pública.
+        h (int): Alçada de l'arbre.
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
+        next_index (int): Primera fulla no utilitzada.
+    """
+
+    write_json_atomic(sk_filename, {
+        "h": h,
+        "w": w,
+        "n": n,
+        "seed": seed.hex(),
+        "public_seed": public_seed.hex(),
+        "next_index": next_index
+    })
+
+    write_json_atomic(pk_filename, {
+        "pk_hash": mss_wots_pk_hash(root, public_seed).hex(),
+        "root": root.hex(),
+        "public_seed": public_seed.hex(),
+        "h": h,
+        "w": w,
+        "n": n
+    })
+
+def load_mss_wots_keys(sk_filename, pk_filename):
+    """
+    Carrega una clau MSS-WOTS+ i comprova que les parts privada i pública són coherents.
+    Args:
+        sk_filename (str): Fitxer de la clau privada.
+        pk_filename (str): Fitxer de la clau pública.
+    Return:
+        dict: 'seed', 'public_seed', 'root', 'h', 'w', 'n' i 'next_index'.
+    """
+
+    with open(sk_filename, "r") as f:
+        sk_data = json.load(f)
+    with open(pk_filename, "r") as f:
+        pk_data = json.load(f)
+
+    keys = {
+        "seed": bytes.fromhex(sk_data["seed"]),
+        "public_seed": bytes.fromhex(pk_data["public_seed"]),
+        "root": bytes.fromhex(pk_data["root"]),
+        "h": pk_data["h"],
+        "w": pk_data["w"],
+        "n": pk_data["n"],
+        "next_index": sk_data["next_index"],
+    }
+    if (sk_data["public_seed"] != pk_data["public_seed"]
+            or (sk_data["h"], sk_data["w"], sk_data["n"]) != (keys["h"], keys["w"], keys["n"])):
+        raise ValueError(f"Els fitxers {sk_filename} i {pk_filename} no són de la mateixa clau")
+    if mss_wots_pk_hash(keys["root"], keys["public_seed"]).hex() != pk_data["pk_hash"]:
+        raise ValueError(f"El pk_hash de {pk_filename} no correspon a l'arrel i la llavor pública")
+    return keys
+
+def mss_wots_sign_next(message, sk_filename, pk_filename, tree_filename):
+    """
+    Signa amb la següent fulla no utilitzada. El comptador 'next_index' es desa a disc
+    abans de signar, de manera que una caiguda mai no fa reutilitzar una fulla.
+    Args:
+        message (bytes): Missatge a signar.
+        sk_filename (str): Fitxer de la clau privada.
+        pk_filename (str): Fitxer de la clau pública.
+        tree_filename (str): Fitxer de l'arbre (save_tree_file()).
+    Return:
+        dict: Signatura retornada per mss_wots_sign().
+    """
+    keys = load_mss_wots_keys(sk_filename, pk_filename)
+    index = keys["next_index"]
+    if index >= 2**keys["h"]:
+        raise ValueError("Totes les fulles de la clau MSS-WOTS+ ja s'han utilitzat")
+
+    save_mss_wots_keys(keys["seed"], keys["public_seed"], keys["root"], sk_filename, pk_filename,
+                       keys["h"], keys["w"], keys["n"], next_index=index + 1)
+
+    store = open_tree_file(tree_filename)
+    try:
+        if tree_root(store) != keys["root"]:
+            raise ValueError(f"L'arbre de {tree_filename} no correspon a la clau")
+        return mss_wots_sign(message, index, keys["seed"], keys["public_seed"], store,
+                             keys["w"], keys["n"])
+    finally:
+        close_tree_file(store)
+
+
+def main():
+    """
+    Genera claus MSS amb fulles WOTS+ i les guarda en fitxers JSON, i l'arbre en un fitxer binari.
+    """
+
+    os.makedirs("mss_lots", exist_ok=True)
+
+    # Fitxers on es guarden les claus
+    SkFile = "mss_lots/sk_MSS_WOTS.json"
+    PkFile = "mss_lots/pk_MSS_WOTS.json"
+    TreeFile = "mss_lots/tree_MSS_WOTS.bin"
+
+    # Generació
+    h = 3  # 2^3 = 8 claus WOTS+ (fulles)
+    seed, public_seed, tree, root = mss_wots_keygen(h=h)
+
+    # Guardar
+    save_mss_wots_keys(seed, public_seed, root, SkFile, PkFile, h=h)
+    save_tree_file(tree[0], TreeFile)
+    print(f"Claus MSS-WOTS+ generades i guardades en {SkFile} i {PkFile}")
+    print(f"Arbre guardat en {TreeFile}")
+    print(f"Mida de la signatura: {signature_size(h)} bytes")
+
+if __name__ == "__main__":
+    main()
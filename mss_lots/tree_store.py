@@ -0,0 +1,190 @@
+"""
+Emmagatzematge en disc d'arbres de Merkle MSS amb accés via mmap.
+
+Format del fitxer:
+    capçalera (16 bytes): b"MSST" | versió (1) | mida node (1) | h (1) | 9 bytes a zero
+    nivell 0 (2^h fulles), nivell 1 (2^(h-1) nodes), ..., nivell h (arrel)
+
+Cada nivell és contigu, de manera que la posició d'un node es calcula directament:
+    offset(l, i) = CAPÇALERA + NODE * (2^(h+1) - 2^(h-l+1) + i)
+
+Els signadors obren el fitxer en mode només lectura; diversos processos comparteixen
+les mateixes pàgines de la cache del sistema i els auth paths són h lectures directes.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+MAGIC = b"MSST"
+VERSION = 1
+NODE_SIZE = 32  # SHA-256
+HEADER = struct.Struct(">4sBBB9x")
+
+
+def H(data):
+    """
+    Descripció: Aplica SHA-256 sobre les dades d'entrada.
+    Args: data (bytes): Dades a hashejar.
+    Return: bytes: Digest SHA-256.
+    """
+    return hashlib.sha256(data).digest()
+
+def level_offset(h, level):
+    """
+    Posició (en bytes) del primer node d'un nivell dins el fitxer.
+    Args:
+        h (int): Alçada de l'arbre.
+        level (int): Nivell (0 = fulles, h = arrel).
+    Return:
+        int: Offset en bytes.
+    """
+    return HEADER.size + NODE_SIZE * (2**(h + 1) - 2**(h - level + 1))
+
+def tree_file_size(h):
+    """
+    Mida total del fitxer d'un arbre d'alçada h.
+    """
+    return level_offset(h, h + 1)
+
+def save_tree_file(leaves, path):
+    """
+    Construeix l'arbre de Merkle a partir de les fulles i l'escriu nivell a nivell al fitxer.
+    Només es mantenen dos nivells en memòria. L'escriptura és atòmica (fitxer temporal + rename).
+    Args:
+        leaves (list[bytes]): Fulles de l'arbre (2^h hashes).
+        path (str): Ruta del fitxer de sortida.
+    Return:
+        bytes: Arrel de l'arbre.
+    """
+    h = len(leaves).bit_length() - 1
+    if len(leaves) != 2**h:
+        raise ValueError("El nombre de fulles ha de ser una potència de 2")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, NODE_SIZE, h))
+        level = leaves
+        f.write(b''.join(level))
+        while len(level) > 1:
+            level = [H(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+            f.write(b''.join(level))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return level[0]
+
+def save_tree_file_from_leaves(leaves_path, path, chunk_nodes=1 << 16):
+    """
+    Com save_tree_file(), però llegeix les fulles d'un fitxer (hashes de 32 bytes concatenats)
+    i calcula cada nivell a partir del nivell anterior ja escrit al disc, per blocs de
+    chunk_nodes nodes. La memòria no depèn de la mida de l'arbre.
+    Args:
+        leaves_path (str): Fitxer amb les 2^h fulles.
+        path (str): Ruta del fitxer de sortida.
+        chunk_nodes (int): Nodes llegits per bloc (ha de ser parell).
+    Return:
+        bytes: Arrel de l'arbre.
+    """
+    size = os.path.getsize(leaves_path)
+    num_leaves = size // NODE_SIZE
+    h = num_leaves.bit_length() - 1
+    if size % NODE_SIZE != 0 or num_leaves != 2**h:
+        raise ValueError("El nombre de fulles ha de ser una potència de 2")
+    if chunk_nodes < 2 or chunk_nodes % 2 != 0:
+        raise ValueError("chunk_nodes ha de ser parell")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w+b") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, NODE_SIZE, h))
+        with open(leaves_path, "rb") as src:
+            for block in iter(lambda: src.read(chunk_nodes * NODE_SIZE), b""):
+                f.write(block)
+
+        for level in range(h):
+            count = 2**(h - level)
+            for start in range(0, count, chunk_nodes):
+                f.seek(level_offset(h, level) + start * NODE_SIZE)
+                data = f.read(min(chunk_nodes, count - start) * NODE_SIZE)
+                parents = b''.join(H(data[i:i + 2 * NODE_SIZE]) for i in range(0, len(data), 2 * NODE_SIZE))
+                f.seek(level_offset(h, level + 1) + (start // 2) * NODE_SIZE)
+                f.write(parents)
+
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(level_offset(h, h))
+        root = f.read(NODE_SIZE)
+    os.replace(tmp_path, path)
+    return root
+
+def open_tree_file(path):
+    """
+    Obre un fitxer d'arbre amb mmap en mode només lectura.
+    Args:
+        path (str): Ruta del fitxer.
+    Return:
+        dict: Magatzem amb les claus 'file', 'mm' i 'h'.
+    """
+    f = open(path, "rb")
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        f.close()
+        raise
+
+    magic, version, node_size, h = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or version != VERSION or node_size != NODE_SIZE or len(mm) != tree_file_size(h):
+        mm.close()
+        f.close()
+        raise ValueError(f"Fitxer d'arbre no vàlid: {path}")
+
+    # Els auth paths fan lectures disperses: no cal llegir per avançat
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+        mm.madvise(mmap.MADV_RANDOM)
+
+    return {"file": f, "mm": mm, "h": h}
+
+def close_tree_file(store):
+    """
+    Tanca el mmap i el fitxer d'un magatzem obert amb open_tree_file().
+    """
+    store["mm"].close()
+    store["file"].close()
+
+def read_node(store, level, index):
+    """
+    Llegeix un node de l'arbre.
+    Args:
+        store (dict): Magatzem obert amb open_tree_file().
+        level (int): Nivell del node (0 = fulles).
+        index (int): Índex del node dins el nivell.
+    Return:
+        bytes: Hash del node.
+    """
+    h = store["h"]
+    if not 0 <= level <= h or not 0 <= index < 2**(h - level):
+        raise IndexError(f"Node fora de rang: nivell {level}, índex {index}")
+    offset = level_offset(h, level) + index * NODE_SIZE
+    return store["mm"][offset:offset + NODE_SIZE]
+
+def tree_root(store):
+    """
+    Retorna l'arrel de l'arbre emmagatzemat.
+    """
+    return read_node(store, store["h"], 0)
+
+def get_auth_path_from_file(store, index):
+    """
+    Obté el camí d'autenticació d'una fulla llegint directament els nodes germans del fitxer.
+    Args:
+        store (dict): Magatzem obert amb open_tree_file().
+        index (int): Índex de la fulla.
+    Return:
+        list[bytes]: Llista de nodes germans per autenticar.
+    """
+    path = []
+    for level in range(store["h"]):
+        path.append(read_node(store, level, index ^ 1))
+        index //= 2
+    return path
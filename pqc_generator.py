@@ -5,10 +5,27 @@ Executa de forma ordenada els passos següents:
  2. Construcció de l'arbre de Merkle a partir de les pk
  3. Derivació de la clau privada ECC des del root
  4. Generació de la public key ECC i adreça Bitcoin
+
+Cada pas és una etapa d'un graf de dependències. Les sortides de cada etapa
+s'identifiquen amb un hash de les seves entrades (fitxers, codi i paràmetres),
+i en tornar a executar només es recalculen les etapes invalidades.
+Si una sortida es modifica fora del generador, l'etapa no es torna a executar
+(no se sobreescriuen les claus de l'usuari): només s'invaliden les següents.
+
+Ús:
+    python pqc_generator.py                 # recalcula només el necessari
+    python pqc_generator.py --dry-run       # mostra què es recalcularia
+    python pqc_generator.py --force ecc     # força una etapa encara que estigui a la cache
+    python pqc_generator.py --force all     # ho regenera tot
 """
 
+import argparse
+import hashlib
+import json
+import os
+
 from lamport.keygen_lamport import main as generate_lamport_keys
-from wots_plus.keygen_wots_plus import main as generate_wots_keys
+from wots_plus.keygen_wots_plus import main as generate_wots_keys, W, N
 from mss_lots.keygen_mss import main as generate_mss_keys
 from sphincs.sphincs_temp import main as generate_temp_sphincs_keys
 from sphincs.keygen_sphincs import main as generate_sphincs_keys
@@ -16,33 +33,270 @@ from merkle_ecc.build_merkle_tree import main as build_merkle_tree
 from ecc.ecc_keys import main as generate_ecc_keys_from_merkle_root
 from ecc.btc_address import main as generate_btc_address
 
+CACHE_FILE = ".pqc_cache.json"
+
+# Graf d'etapes en ordre topològic. Cada etapa declara les seves entrades
+# (incloent-hi el seu propi codi), les sortides i els paràmetres que rep.
+STAGES = [
+    {
+        "name": "lamport",
+        "run": generate_lamport_keys,
+        "inputs": ["lamport/keygen_lamport.py"],
+        "outputs": ["lamport/sk_Lamport.json", "lamport/pk_Lamport.json"],
+        "params": {},
+    },
+    {
+        "name": "wots_plus",
+        "run": generate_wots_keys,
+        "inputs": ["wots_plus/keygen_wots_plus.py"],
+        "outputs": ["wots_plus/sk_Winternitz.json", "wots_plus/pk_Winternitz.json"],
+        "params": {"w": W, "n": N},
+    },
+    {
+        "name": "mss_lots",
+        "run": generate_mss_keys,
+        "inputs": ["mss_lots/keygen_mss.py", "mss_lots/tree_store.py"],
+        "outputs": ["mss_lots/sk_MSS.json", "mss_lots/pk_MSS.json", "mss_lots/tree_MSS.bin"],
+        "params": {},
+    },
+    {
+        "name": "sphincs",
+        "run": generate_sphincs_keys,
+        #"run": generate_temp_sphincs_keys, #Nomes si s'utilitza windows
+        "inputs": ["sphincs/keygen_sphincs.py"],
+        "outputs": ["sphincs/sk_Sphincs.json", "sphincs/pk_Sphincs.json"],
+        "params": {},
+    },
+    {
+        "name": "merkle",
+        "run": build_merkle_tree,
+        "inputs": [
+            "merkle_ecc/build_merkle_tree.py",
+            "lamport/pk_Lamport.json",
+            "wots_plus/pk_Winternitz.json",
+            "mss_lots/pk_MSS.json",
+            "sphincs/pk_Sphincs.json",
+        ],
+        "outputs": ["merkle_ecc/root_merkle.json"],
+        "params": {},
+    },
+    {
+        "name": "ecc",
+        "run": generate_ecc_keys_from_merkle_root,
+        "inputs": ["ecc/ecc_keys.py", "merkle_ecc/root_merkle.json"],
+        "outputs": ["ecc/ecc_private_key_wif.txt", "ecc/ecc_public_key_hex.txt"],
+        "params": {},
+    },
+    {
+        "name": "address",
+        "run": generate_btc_address,
+        "inputs": ["ecc/btc_address.py", "ecc/ecc_private_key_wif.txt"],
+        "outputs": ["ecc/btc_address.txt"],
+        "params": {},
+    },
+]
+
+STAGE_NAMES = [stage["name"] for stage in STAGES]
+
+
+def file_hash(path):
+    """
+    Calcula el SHA-256 del contingut d'un fitxer.
+    Args:
+        path (str): Ruta del fitxer.
+    Return:
+        str: Digest en hexadecimal, o None si el fitxer no existeix.
+    """
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def stage_key(stage):
+    """
+    Calcula la clau d'una etapa: hash del nom, paràmetres i contingut de les entrades.
+    Args:
+        stage (dict): Etapa de STAGES.
+    Return:
+        str: Clau en hexadecimal, o None si falta alguna entrada.
+    """
+    inputs = {path: file_hash(path) for path in stage["inputs"]}
+    if None in inputs.values():
+        return None
+    material = json.dumps({
+        "stage": stage["name"],
+        "params": stage["params"],
+        "inputs": inputs,
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def load_cache(path=CACHE_FILE):
+    """
+    Carrega el registre d'etapes ja calculades.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_cache(cache, path=CACHE_FILE):
+    """
+    Guarda el registre d'etapes de forma atòmica.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def stale_reason(stage, cache, changed, producers, forced):
+    """
+    Determina si una etapa s'ha de recalcular.
+    Args:
+        stage (dict): Etapa a comprovar.
+        cache (dict): Registre d'etapes calculades.
+        changed (set[str]): Etapes anteriors les sortides de les quals han canviat (o poden canviar).
+        producers (dict): Fitxer -> etapa que el genera.
+        forced (set[str]): Etapes forçades per l'usuari.
+    Return:
+        str: Motiu per recalcular, o None si la cache és vàlida.
+    """
+    name = stage["name"]
+    if name in forced:
+        return "forçada"
+
+    for path in stage["inputs"]:
+        if producers.get(path) in changed:
+            return f"depèn de '{producers[path]}'"
+
+    key = stage_key(stage)
+    if key is None:
+        return "falta alguna entrada"
+
+    entry = cache.get(name)
+    if entry is None:
+        return "sense cache"
+    if entry["key"] != key:
+        return "entrades o paràmetres canviats"
+
+    # Una sortida que no existeix no es pot conservar: l'etapa es torna a executar
+    for path in stage["outputs"]:
+        if not os.path.exists(path):
+            return f"falta la sortida {path}"
+    return None
+
+
+def modified_outputs(stage, cache):
+    """
+    Compara les sortides d'una etapa amb les registrades a la cache.
+    Una sortida modificada fora del generador (per exemple, una clau generada a mà)
+    no fa recalcular l'etapa, perquè se sobreescriurien les claus de l'usuari.
+    Les sortides que falten les tracta stale_reason().
+    Args:
+        stage (dict): Etapa a comprovar.
+        cache (dict): Registre d'etapes calculades.
+    Return:
+        dict: Fitxer -> hash actual de les sortides existents que han canviat.
+    """
+    entry = cache.get(stage["name"])
+    if entry is None:
+        return {}
+    modified = {}
+    for path, digest in entry["outputs"].items():
+        current = file_hash(path)
+        if current is not None and current != digest:
+            modified[path] = current
+    return modified
+
+
+def run_stages(forced=(), dry_run=False, cache_file=CACHE_FILE):
+    """
+    Recorre el graf d'etapes i executa només les invalidades.
+    Args:
+        forced (iterable[str]): Etapes a recalcular sempre ('all' per totes).
+        dry_run (bool): Si és True, només informa del que es recalcularia.
+        cache_file (str): Fitxer del registre d'etapes.
+    Return:
+        list[str]: Etapes recalculades (o que es recalcularien en dry-run).
+    """
+    forced = set(STAGE_NAMES) if "all" in forced else set(forced)
+    producers = {path: stage["name"] for stage in STAGES for path in stage["outputs"]}
+    cache = load_cache(cache_file)
+    changed = set()
+    recomputed = []
+
+    for stage in STAGES:
+        name = stage["name"]
+        reason = stale_reason(stage, cache, changed, producers, forced)
+
+        if reason is None:
+            modified = modified_outputs(stage, cache)
+            if not modified:
+                print(f"[cache] {name}")
+                continue
+
+            # Es conserven les sortides de l'usuari: només s'invaliden les etapes següents
+            changed.add(name)
+            for path in modified:
+                print(f"[modificada] {name}: sortida {path} modificada fora del generador")
+            if not dry_run:
+                cache[name]["outputs"].update(modified)
+                save_cache(cache, cache_file)
+            continue
+
+        recomputed.append(name)
+
+        if dry_run:
+            # Sense executar no se sap si les sortides canviaran: se suposa que sí
+            changed.add(name)
+            print(f"[recalcularia] {name}: {reason}")
+            continue
+
+        print(f"[recalcula] {name}: {reason}")
+        stage["run"](**stage["params"])
+        print()
+
+        outputs = {path: file_hash(path) for path in stage["outputs"]}
+        missing = [path for path, digest in outputs.items() if digest is None]
+        if missing:
+            raise RuntimeError(f"L'etapa '{name}' no ha generat: {', '.join(missing)}")
+        previous = cache.get(name)
+
+        # Si les sortides són idèntiques a les anteriors, les etapes següents no s'invaliden
+        if previous is None or previous["outputs"] != outputs:
+            changed.add(name)
+
+        cache[name] = {"key": stage_key(stage), "outputs": outputs}
+        save_cache(cache, cache_file)
+
+    return recomputed
+
 
 def main():
     """
     Funció principal que coordina la generació de tots els components del sistema.
-    No rep paràmetres. No retorna res.
     Les funcions que executa escriuen les seves sortides en fitxers .json o .txt
-    segons el cas.
-    """
-
-    # 1. Generació de claus per a cada esquema HBS
-    generate_lamport_keys()
-    generate_wots_keys()
-    generate_mss_keys()
-    #generate_temp_sphincs_keys() #Nomes si s'utilitza windows
-    generate_sphincs_keys()
-    print()
-
-    # 2. Construcció de l'arbre de Merkle i obtenció de l'arrel
-    build_merkle_tree()
-    print()
-
-    # 3. Derivació de la clau privada ECC i guardat
-    generate_ecc_keys_from_merkle_root()
-    print()
-    
-    # 4. Generació de l'adreça Bitcoin i guardat
-    generate_btc_address()
+    segons el cas. Les etapes amb entrades sense canvis es reutilitzen de la cache.
+    """
+
+    parser = argparse.ArgumentParser(description="Generador central TFG-PQC")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        choices=STAGE_NAMES + ["all"],
+                        help="recalcula l'etapa indicada encara que estigui a la cache (es pot repetir)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="mostra les etapes que es recalcularien sense executar-les")
+    args = parser.parse_args()
+
+    recomputed = run_stages(args.force, args.dry_run)
+
+    if not recomputed:
+        print("Totes les etapes estan actualitzades.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,214 @@
+"""
+Servei de signatura SPHINCS+ (sha2_128s) amb un pool de processos.
+
+La clau secreta es carrega i es valida una sola vegada al procés principal (un
+fitxer incorrecte falla de seguida) i cada procés treballador la rep en arrencar;
+després només rep missatges. Les signatures es retornen en el mateix ordre que
+els missatges. Per fitxers grans, sign_stream() manté com a molt 'max_inflight'
+missatges pendents, de manera que la memòria és acotada.
+
+Ús (des de l'arrel del projecte):
+    python -m sphincs.sign_sphincs --in missatges.txt --out signatures.txt --workers 8
+El fitxer d'entrada té un missatge per línia; el de sortida, una signatura en hex per línia.
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+
+import pyspx.sha2_128s as sphincs  # SPHINCS+ variant: 128-bit security with SHA-2
+
+# Clau secreta del procés treballador (es rep a init_worker)
+_worker_sk = None
+
+
+def load_sphincs_sk(path="sphincs/sk_Sphincs.json"):
+    """
+    Carrega la clau secreta SPHINCS+ des del fitxer JSON i en comprova la mida.
+    """
+    with open(path, "r") as f:
+        sk = bytes.fromhex(json.load(f)["sk"])
+    if len(sk) != sphincs.crypto_sign_SECRETKEYBYTES:
+        raise ValueError(f"La clau secreta de {path} no és una clau SPHINCS+ vàlida")
+    return sk
+
+def load_sphincs_pk(path="sphincs/pk_Sphincs.json"):
+    """
+    Carrega la clau pública SPHINCS+ des del fitxer JSON.
+    """
+    with open(path, "r") as f:
+        return bytes.fromhex(json.load(f)["pk"])
+
+def sphincs_sign(message, sk):
+    """
+    Signa un missatge amb SPHINCS+.
+    Args:
+        message (bytes): Missatge a signar.
+        sk (bytes): Clau secreta.
+    Return:
+        bytes: Signatura.
+    """
+    return sphincs.sign(message, sk)
+
+def sphincs_verify(message, signature, pk):
+    """
+    Verifica una signatura SPHINCS+.
+    Args:
+        message (bytes): Missatge signat.
+        signature (bytes): Signatura.
+        pk (bytes): Clau pública.
+    Return:
+        bool: True si la signatura és vàlida.
+    """
+    return sphincs.verify(message, signature, pk)
+
+
+def init_worker(sk):
+    """
+    Inicialitza un procés treballador amb la clau secreta ja carregada.
+    """
+    global _worker_sk
+    _worker_sk = sk
+
+def sign_in_worker(message):
+    """
+    Signa un missatge amb la clau carregada al procés treballador.
+    """
+    return sphincs_sign(message, _worker_sk)
+
+
+class SphincsSigningPool:
+    """
+    Pool de processos que signen missatges amb SPHINCS+.
+    Args:
+        sk_file (str): Fitxer JSON amb la clau secreta.
+        workers (int, optional): Nombre de processos (per defecte, un per CPU).
+    """
+
+    def __init__(self, sk_file="sphincs/sk_Sphincs.json", workers=None):
+        self.workers = workers or os.cpu_count()
+        # Es carrega aquí: si el fitxer falta o no és vàlid, l'error surt abans de crear el pool
+        sk = load_sphincs_sk(sk_file)
+        self._pool = Pool(self.workers, initializer=init_worker, initargs=(sk,))
+        self._messages = 0
+        self._seconds = 0.0
+
+    def sign_batch(self, messages, chunksize=1):
+        """
+        Signa una llista de missatges repartint-los entre els processos.
+        Args:
+            messages (list[bytes]): Missatges a signar.
+            chunksize (int): Missatges per tasca enviada a cada procés.
+        Return:
+            list[bytes]: Signatures, en el mateix ordre que els missatges.
+        """
+        start = time.perf_counter()
+        signatures = self._pool.map(sign_in_worker, messages, chunksize)
+        self._seconds += time.perf_counter() - start
+        self._messages += len(signatures)
+        return signatures
+
+    def sign_stream(self, messages, max_inflight=None):
+        """
+        Signa un iterable de missatges amb memòria acotada.
+        Args:
+            messages (iterable[bytes]): Missatges a signar (es llegeixen a mesura que cal).
+            max_inflight (int, optional): Màxim de missatges pendents (per defecte, 4 per procés).
+        Return:
+            generator[bytes]: Signatures, en el mateix ordre que els missatges.
+        """
+        max_inflight = max_inflight or 4 * self.workers
+        pending = deque()
+        start = time.perf_counter()
+        try:
+            for message in messages:
+                pending.append(self._pool.apply_async(sign_in_worker, (message,)))
+                if len(pending) >= max_inflight:
+                    yield pending.popleft().get()
+                    self._messages += 1
+            while pending:
+                yield pending.popleft().get()
+                self._messages += 1
+        finally:
+            self._seconds += time.perf_counter() - start
+
+    def stats(self):
+        """
+        Rendiment acumulat del pool.
+        Return:
+            dict: Missatges signats, temps i missatges per segon.
+        """
+        return {
+            "workers": self.workers,
+            "messages": self._messages,
+            "seconds": self._seconds,
+            "messages_per_sec": self._messages / self._seconds if self._seconds else 0.0,
+        }
+
+    def close(self):
+        """
+        Atura els processos treballadors.
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.terminate()
+
+
+def read_messages(path):
+    """
+    Llegeix un fitxer de missatges línia a línia (sense carregar-lo sencer).
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            yield line.rstrip(b"\r\n")
+
+def sign_file(in_file, out_file, sk_file="sphincs/sk_Sphincs.json", workers=None, max_inflight=None):
+    """
+    Signa totes les línies d'un fitxer i escriu una signatura en hex per línia.
+    Args:
+        in_file (str): Fitxer amb un missatge per línia.
+        out_file (str): Fitxer de sortida.
+        sk_file (str): Fitxer JSON amb la clau secreta.
+        workers (int, optional): Nombre de processos.
+        max_inflight (int, optional): Màxim de missatges pendents.
+    Return:
+        dict: Estadístiques del pool (inclou missatges per segon).
+    """
+    with SphincsSigningPool(sk_file, workers) as pool, open(out_file, "w") as out:
+        for signature in pool.sign_stream(read_messages(in_file), max_inflight):
+            out.write(signature.hex() + "\n")
+        return pool.stats()
+
+
+def main():
+    """
+    Signa un fitxer de missatges amb el pool i mostra els missatges per segon.
+    """
+
+    parser = argparse.ArgumentParser(description="Servei de signatura SPHINCS+ multiprocés")
+    parser.add_argument("--in", dest="in_file", required=True, help="fitxer amb un missatge per línia")
+    parser.add_argument("--out", dest="out_file", required=True, help="fitxer de signatures (hex)")
+    parser.add_argument("--sk", default="sphincs/sk_Sphincs.json", help="fitxer de la clau secreta")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-inflight", type=int, default=None)
+    args = parser.parse_args()
+
+    stats = sign_file(args.in_file, args.out_file, args.sk, args.workers, args.max_inflight)
+    print(f"{stats['messages']} missatges signats amb {stats['workers']} processos "
+          f"en {stats['seconds']:.2f} s ({stats['messages_per_sec']:.1f} missatges/s)")
+    print(f"Signatures guardades a {args.out_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,11 @@ import json
 import math
 import os
 
-# Paràmetres globals
+# Paràmetres globals (valors per defecte)
 W = 16  # Base Winternitz
 N = 256  # Ja que utilitzo SHA-256
 SEED_SIZE = 32
-LOG_W = int(math.log2(W))
+W_VALUES = (4, 16, 256)  # Bases Winternitz suportades
 
 def H(data):
     """
@@ -42,31 +42,81 @@ def chain_function(x, r_list, steps):
     """
     result = x
     for i in range(steps):
-        result = H(bytes(a ^ b for a, b in zip(result, r_list[i]))) # El simbol ^ es la XOR
+        # XOR com a enters (el simbol ^ es la XOR): molt més ràpid que byte a byte
+        masked = int.from_bytes(result, 'big') ^ int.from_bytes(r_list[i], 'big')
+        result = H(masked.to_bytes(len(result), 'big'))
     return result
 
-def to_base_w(value, digits):
+def wots_params(w=W, n=N):
     """
-    Converteix un enter a la seva representació en base W.
+    Calcula els paràmetres derivats de WOTS+ per una base w i una mida de missatge n.
+    Args:
+        w (int): Base Winternitz (4, 16 o 256).
+        n (int): Nombre de bits del missatge a signar (com a màxim 256).
+    Return:
+        tuple: (log_w, l1, l2, L)
+            log_w (int): Bits per dígit en base w.
+            l1 (int): Nombre de dígits del missatge.
+            l2 (int): Nombre de dígits del checksum.
+            L (int): Longitud total del vector de claus.
+    """
+    if w not in W_VALUES:
+        raise ValueError(f"Base Winternitz no suportada: {w} (valors possibles: {W_VALUES})")
+    if n <= 0 or n > N or n % 8 != 0:
+        raise ValueError(f"Mida de missatge no suportada: {n} bits")
+
+    log_w = int(math.log2(w))
+    l1 = math.ceil(n / log_w)
+    l2 = math.floor(math.log2(l1 * (w - 1)) / log_w) + 1
+    return log_w, l1, l2, l1 + l2
+
+def to_base_w(value, digits, w=W):
+    """
+    Converteix un enter a la seva representació en base w.
     Args:
         value (int): Valor a convertir.
         digits (int): Nombre de dígits desitjat.
+        w (int): Base Winternitz.
     Return:
         list[int]: Representació en base w (llista de dígits).
     """
 
     output = []
     for _ in range(digits):
-        output.append(value % W)
-        value //= W
+        output.append(value % w)
+        value //= w
     return output[::-1] # Invertida
 
+def message_digits(message, w=W, n=N):
+    """
+    Obté els dígits en base w del missatge (n bits del seu hash) seguits del checksum.
+    Args:
+        message (bytes): Missatge a signar.
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
+    Return:
+        list[int]: L dígits en base w.
+    """
+    log_w, l1, l2, _ = wots_params(w, n)
+
+    # Es signen els n bits més significatius del hash, completats fins a l1 dígits
+    value = int.from_bytes(H(message), 'big') >> (N - n)
+    value <<= l1 * log_w - n
+    msg_digits = to_base_w(value, l1, w)
 
-def wots_plus_keygen(seed=None):
+    checksum = sum(w - 1 - d for d in msg_digits)
+    return msg_digits + to_base_w(checksum, l2, w)
+
+
+def wots_plus_keygen(seed=None, w=W, n=N, r_masks=None):
     """
     Genera claus WOTS+ a partir d'una llavor opcional.
     Args:
         seed (bytes, optional): Llavor d'entrada. Si és None, es genera aleatòriament.
+        w (int): Base Winternitz (4, 16 o 256).
+        n (int): Nombre de bits del missatge a signar.
+        r_masks (list[list[bytes]], optional): Màscares públiques ja generades
+            (per compartir-les entre diverses claus). Si és None, es generen aleatòriament.
     Return:
         tuple: (sk, r_masks, pk, L)
             sk (list[bytes]): Claus secretes.
@@ -78,34 +128,84 @@ def wots_plus_keygen(seed=None):
         seed = secrets.token_bytes(SEED_SIZE)
 
     # Calcular longitud L
-    l1 = math.ceil(N / LOG_W)
-    l2 = math.ceil(math.log2(l1 * (W - 1)) / LOG_W)
-    L = l1 + l2
+    _, _, _, L = wots_params(w, n)
 
     # Clau privada: sk = G(seed)
     sk = prg(seed, L)
 
     # Màscares públiques per cada pas de cada bloc
-    r_masks = [[secrets.token_bytes(SEED_SIZE) for _ in range(W - 1)] for _ in range(L)]
+    if r_masks is None:
+        r_masks = [[secrets.token_bytes(SEED_SIZE) for _ in range(w - 1)] for _ in range(L)]
 
     # Clau pública: pk[i] = c_{w-1}(sk[i], r[i])
-    pk = [chain_function(sk[i], r_masks[i], W - 1) for i in range(L)]
+    pk = [chain_function(sk[i], r_masks[i], w - 1) for i in range(L)]
 
     return sk, r_masks, pk, L
 
-def save_winternitz_keys(sk, r_masks, pk, sk_file, pk_file):
+def wots_plus_sign(message, sk, r_masks, w=W, n=N):
+    """
+    Signa un missatge amb una clau WOTS+.
+    Args:
+        message (bytes): Missatge a signar.
+        sk (list[bytes]): Claus secretes.
+        r_masks (list[list[bytes]]): Màscares públiques.
+        w (int): Base Winternitz de la clau.
+        n (int): Nombre de bits signats per la clau.
+    Return:
+        list[bytes]: Signatura (L valors): sig[i] = c_{d_i}(sk[i], r[i]).
+    """
+    digits = message_digits(message, w, n)
+    return [chain_function(sk[i], r_masks[i], d) for i, d in enumerate(digits)]
+
+def wots_plus_pk_from_sig(message, signature, r_masks, w=W, n=N):
+    """
+    Recalcula la clau pública WOTS+ completant les cadenes des de la signatura.
+    Args:
+        message (bytes): Missatge signat.
+        signature (list[bytes]): Signatura WOTS+.
+        r_masks (list[list[bytes]]): Màscares públiques.
+        w (int): Base Winternitz de la clau.
+        n (int): Nombre de bits signats per la clau.
+    Return:
+        list[bytes]: Clau pública recalculada.
+    """
+    digits = message_digits(message, w, n)
+    return [chain_function(signature[i], r_masks[i][d:], w - 1 - d) for i, d in enumerate(digits)]
+
+def wots_plus_verify(message, signature, r_masks, pk, w=W, n=N):
     """
-    Guarda les claus WOTS+ en fitxers JSON.
+    Verifica una signatura WOTS+.
+    Args:
+        message (bytes): Missatge signat.
+        signature (list[bytes]): Signatura WOTS+.
+        r_masks (list[list[bytes]]): Màscares públiques.
+        pk (list[bytes]): Claus públiques.
+        w (int): Base Winternitz de la clau.
+        n (int): Nombre de bits signats per la clau.
+    Return:
+        bool: True si la signatura és vàlida.
+    """
+    if len(signature) != len(pk):
+        return False
+    return wots_plus_pk_from_sig(message, signature, r_masks, w, n) == pk
+
+def save_winternitz_keys(sk, r_masks, pk, sk_file, pk_file, w=W, n=N):
+    """
+    Guarda les claus WOTS+ en fitxers JSON, juntament amb els paràmetres (w, n) de la clau.
     Args:
         sk (list[bytes]): Claus secretes.
         r_masks (list[list[bytes]]): Màscares públiques.
         pk (list[bytes]): Claus públiques.
         sk_file (str): Fitxer de sortida per les claus secretes.
         pk_file (str): Fitxer de sortida per les claus públiques.
+        w (int): Base Winternitz de la clau.
+        n (int): Nombre de bits signats per la clau.
     """
 
     with open(sk_file, "w") as f:
         json.dump({
+            "w": w,
+            "n": n,
             "sk": [s.hex() for s in sk],
             "r_masks": [[r.hex() for r in rlist] for rlist in r_masks]
         }, f, indent=4)
@@ -114,14 +214,47 @@ def save_winternitz_keys(sk, r_masks, pk, sk_file, pk_file):
 
     with open(pk_file, "w") as f:
         json.dump({
+            "w": w,
+            "n": n,
             "pk_hash": pk_hash.hex(),
             "pk": [p.hex() for p in pk]
         }, f, indent=4)
 
+def load_winternitz_keys(sk_file, pk_file):
+    """
+    Carrega unes claus WOTS+ i els seus paràmetres des dels fitxers JSON.
+    Els fitxers antics sense paràmetres es consideren generats amb (W, N).
+    Args:
+        sk_file (str): Fitxer amb les claus secretes.
+        pk_file (str): Fitxer amb les claus públiques.
+    Return:
+        tuple: (sk, r_masks, pk, w, n)
+    """
+
+    with open(sk_file, "r") as f:
+        sk_data = json.load(f)
+    with open(pk_file, "r") as f:
+        pk_data = json.load(f)
+
+    sk = [bytes.fromhex(s) for s in sk_data["sk"]]
+    r_masks = [[bytes.fromhex(r) for r in rlist] for rlist in sk_data["r_masks"]]
+    pk = [bytes.fromhex(p) for p in pk_data["pk"]]
+
+    w, n = pk_data.get("w", W), pk_data.get("n", N)
+    if (sk_data.get("w", W), sk_data.get("n", N)) != (w, n):
+        raise ValueError(f"Els paràmetres de {sk_file} i {pk_file} no coincideixen")
+    _, _, _, L = wots_params(w, n)
+    if len(sk) != L or len(pk) != L or len(r_masks) != L:
+        raise ValueError(f"La mida de les claus no correspon a w={w}, n={n}")
+    return sk, r_masks, pk, w, n
 
-def main():
+
+def main(w=W, n=N):
     """
     Genera claus WOTS+ i les guarda als fitxers JSON dins la carpeta 'wots_plus'.
+    Args:
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
     """
 
     os.makedirs("wots_plus", exist_ok=True)
@@ -131,11 +264,11 @@ def main():
     PkFile = "wots_plus/pk_Winternitz.json"
 
     # Generació
-    sk, r_masks, pk, L = wots_plus_keygen()
+    sk, r_masks, pk, L = wots_plus_keygen(w=w, n=n)
 
     # Guardar
-    save_winternitz_keys(sk, r_masks, pk, SkFile, PkFile)
-    print(f"Claus WOTS generades i guardades en {SkFile} i {PkFile}")
+    save_winternitz_keys(sk, r_masks, pk, SkFile, PkFile, w=w, n=n)
+    print(f"Claus WOTS (w={w}, n={n}) generades i guardades en {SkFile} i {PkFile}")
 
 
 if __name__ == "__main__":
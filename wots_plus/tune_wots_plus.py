@@ -0,0 +1,139 @@
+"""
+Benchmark d'autoajust del paràmetre Winternitz W.
+
+Per cada W suportat mesura, en aquesta màquina, el temps de generació de claus,
+signatura i verificació, juntament amb la mida de la signatura, de la clau
+pública i de les màscares públiques. Amb pesos per la latència de signatura, el
+temps de verificació i l'ample de banda del verificador, recomana el W amb
+millor compromís.
+
+Ús (des de l'arrel del projecte):
+    python -m wots_plus.tune_wots_plus --n 256 --reps 20 --sign-weight 1 --verify-weight 1 --size-weight 1
+"""
+
+import argparse
+import json
+import secrets
+import time
+
+from wots_plus.keygen_wots_plus import (
+    N, SEED_SIZE, W_VALUES,
+    wots_params, wots_plus_keygen, wots_plus_sign, wots_plus_verify,
+)
+
+
+def time_call(fn, reps):
+    """
+    Mesura el temps mitjà d'execució d'una funció.
+    Args:
+        fn (callable): Funció sense arguments a mesurar.
+        reps (int): Nombre de repeticions.
+    Return:
+        tuple: (temps mitjà en segons, resultat de l'última crida)
+    """
+    result = None
+    start = time.perf_counter()
+    for _ in range(reps):
+        result = fn()
+    return (time.perf_counter() - start) / reps, result
+
+
+def benchmark_w(w, n=N, reps=10):
+    """
+    Mesura temps i mides de WOTS+ per una base w concreta.
+    Args:
+        w (int): Base Winternitz.
+        n (int): Nombre de bits del missatge a signar.
+        reps (int): Repeticions per cada operació.
+    Return:
+        dict: Resultats (temps en ms i mides en bytes).
+    """
+    _, _, _, L = wots_params(w, n)
+    message = secrets.token_bytes(32)
+
+    keygen_s, (sk, r_masks, pk, _) = time_call(lambda: wots_plus_keygen(w=w, n=n), reps)
+    sign_s, signature = time_call(lambda: wots_plus_sign(message, sk, r_masks, w, n), reps)
+    verify_s, valid = time_call(lambda: wots_plus_verify(message, signature, r_masks, pk, w, n), reps)
+
+    if not valid:
+        raise RuntimeError(f"La signatura WOTS+ amb w={w} no verifica")
+
+    return {
+        "w": w,
+        "n": n,
+        "L": L,
+        "keygen_ms": keygen_s * 1000,
+        "sign_ms": sign_s * 1000,
+        "verify_ms": verify_s * 1000,
+        "sig_bytes": L * SEED_SIZE,
+        # El verificador necessita pk i també les màscares públiques
+        "pk_bytes": L * SEED_SIZE,
+        "masks_bytes": L * (w - 1) * SEED_SIZE,
+    }
+
+
+def verifier_bytes(r):
+    """
+    Bytes que ha de rebre el verificador: signatura, clau pública i màscares públiques.
+    """
+    return r["sig_bytes"] + r["pk_bytes"] + r["masks_bytes"]
+
+
+def recommend(results, sign_weight=1.0, verify_weight=1.0, size_weight=1.0):
+    """
+    Tria el W amb menor cost combinat. Cada mètrica es normalitza pel mínim
+    observat, de manera que els pesos són comparables entre temps i bytes.
+    Args:
+        results (list[dict]): Resultats de benchmark_w.
+        sign_weight (float): Pes de la latència de signatura.
+        verify_weight (float): Pes del temps de verificació.
+        size_weight (float): Pes dels bytes que ha de rebre el verificador
+            (signatura + clau pública + màscares).
+    Return:
+        dict: Resultat recomanat, amb el camp 'score' afegit a tots els resultats.
+    """
+    min_sign = min(r["sign_ms"] for r in results)
+    min_verify = min(r["verify_ms"] for r in results)
+    min_size = min(verifier_bytes(r) for r in results)
+
+    for r in results:
+        r["score"] = (sign_weight * r["sign_ms"] / min_sign
+                      + verify_weight * r["verify_ms"] / min_verify
+                      + size_weight * verifier_bytes(r) / min_size)
+
+    return min(results, key=lambda r: r["score"])
+
+
+def main():
+    """
+    Executa el benchmark per tots els W suportats i mostra la recomanació.
+    """
+
+    parser = argparse.ArgumentParser(description="Autoajust del paràmetre Winternitz W")
+    parser.add_argument("--n", type=int, default=N, help="bits del missatge a signar")
+    parser.add_argument("--reps", type=int, default=10, help="repeticions per operació")
+    parser.add_argument("--sign-weight", type=float, default=1.0, help="pes de la latència de signatura")
+    parser.add_argument("--verify-weight", type=float, default=1.0, help="pes del temps de verificació")
+    parser.add_argument("--size-weight", type=float, default=1.0,
+                        help="pes de la mida signatura + pk + màscares")
+    parser.add_argument("--out", help="fitxer JSON on desar els resultats")
+    args = parser.parse_args()
+
+    results = [benchmark_w(w, args.n, args.reps) for w in W_VALUES]
+    best = recommend(results, args.sign_weight, args.verify_weight, args.size_weight)
+
+    print(f"{'W':>4} {'L':>4} {'keygen ms':>10} {'sign ms':>9} {'verify ms':>10} "
+          f"{'sig B':>7} {'pk B':>7} {'mask B':>8} {'score':>7}")
+    for r in results:
+        print(f"{r['w']:>4} {r['L']:>4} {r['keygen_ms']:>10.2f} {r['sign_ms']:>9.2f} "
+              f"{r['verify_ms']:>10.2f} {r['sig_bytes']:>7} {r['pk_bytes']:>7} "
+              f"{r['masks_bytes']:>8} {r['score']:>7.2f}")
+    print(f"W recomanat: {best['w']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"results": results, "recommended_w": best["w"]}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()